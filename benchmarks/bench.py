@@ -0,0 +1,359 @@
+"""
+Benchmarks the game server with all latency set to 0, so only the real work of the server is measured.
+
+1. Board operations (``Board.new``, ``Board.__getitem__``, ``Board.__iter__`` and checking a board) across board sizes
+2. Requests per second and p50/p99 latency for each endpoint at a given concurrency, either against the app in-process
+   or against the app running under uvicorn
+
+Results are written to JSON, and can be compared against the results of another commit.
+
+Run from the root of the repo with:
+    python benchmarks/bench.py --output bench.json
+    python benchmarks/bench.py --output new.json --compare old.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+SIZES = [9, 16, 30, 100, 256, 500, 1000]
+MINE_DENSITY = 0.16  # About the same density as the default 9x9, 10 mine board
+
+
+def zero_latency_env(max_boards: int) -> dict[str, str]:
+    """
+    Parameters
+    ----------
+    max_boards : int
+        Maximum number of outstanding boards for the server
+
+    Returns
+    -------
+    env : dict[str, str]
+        Environment variables that set every endpoint latency to 0
+    """
+    sys.path.insert(0, str(SRC))
+    from settings import LatencySettings
+
+    env = {f"LATENCY__{name.upper()}": "0" for name in LatencySettings.__fields__}
+    env["APP__MAX_BOARDS"] = str(max_boards)
+    env["APP__LATENCY_ENABLED"] = "false"
+    return env
+
+
+def time_per_call(func: Callable[[], object], min_seconds: float = 0.2) -> float:
+    """
+    Calls a function until at least ``min_seconds`` have passed.
+
+    Returns
+    -------
+    seconds : float
+        Mean seconds per call
+    """
+    calls = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < min_seconds or not calls:
+        func()
+        calls += 1
+    return elapsed / calls
+
+
+def bench_board(sizes: list[int]) -> dict[str, dict[str, float]]:
+    """
+    Times the board operations for square boards of each size.
+
+    Returns
+    -------
+    results : dict[str, dict[str, float]]
+        Seconds per call of each operation, by board size
+    """
+    import main
+    import models
+    from settings import BoardSettings
+
+    results = {}
+    for size in sizes:
+        settings = BoardSettings(length=size, height=size, mines=int(size * size * MINE_DENSITY))
+        board = models.Board.new(settings)
+        coords = [(random.randrange(size), random.randrange(size)) for _ in range(1000)]
+
+        def check():
+            with main.STATE.session(None) as session:
+                session.boards.add(board)
+                main.check_in_board(session, board.id)
+
+        results[f"{size}x{size}"] = {
+            "new": time_per_call(lambda: models.Board.new(settings)),
+            "getitem": time_per_call(lambda: [board[c] for c in coords]) / len(coords),
+            "iter": time_per_call(lambda: sum(1 for _ in board)),
+            "check": time_per_call(check),
+        }
+        print(f"{size}x{size}: {results[f'{size}x{size}']}", file=sys.stderr)
+    return results
+
+
+async def load(
+    name: str,
+    client: httpx.AsyncClient,
+    concurrency: int,
+    requests: int,
+    setup: Callable[[httpx.AsyncClient], Awaitable[object]],
+    call: Callable[[httpx.AsyncClient, object, int], Awaitable[httpx.Response]]
+) -> dict[str, float]:
+    """
+    Sends ``requests`` requests to an endpoint from ``concurrency`` workers.
+
+    Parameters
+    ----------
+    name : str
+        Name of the endpoint, for logging
+
+    client : httpx.AsyncClient
+        Client to send requests with
+
+    concurrency : int
+        Number of workers sending requests at once
+
+    requests : int
+        Number of requests per worker
+
+    setup : Callable
+        Called once per worker, its result is passed to every ``call``
+
+    call : Callable
+        Sends a single request, gets the client, the setup result and the number of the request
+
+    Returns
+    -------
+    results : dict[str, float]
+        Requests per second and p50/p99 latency in milliseconds
+    """
+    latencies = []
+
+    async def worker():
+        state = await setup(client)
+        for i in range(requests):
+            start = time.perf_counter()
+            response = await call(client, state, i)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    results = {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+    print(f"{name}: {results}", file=sys.stderr)
+    return results
+
+
+class BoardTracker:
+    """
+    Keeps track of the boards that are outstanding, from the responses of a client, so they can be freed up between
+    endpoints.
+    """
+
+    def __init__(self):
+        self.board_ids: set[str] = set()
+
+    async def __call__(self, response: httpx.Response) -> None:
+        if not response.is_success:
+            return
+
+        match response.request.url.path:
+            case "/board":
+                await response.aread()
+                self.board_ids.add(response.json()["id"])
+            case "/boards":
+                await response.aread()
+                self.board_ids.update(board["id"] for board in response.json()["boards"])
+            case "/check":
+                self.board_ids.discard(response.request.url.params["board_id"])
+            case "/check_many":
+                self.board_ids.difference_update(json.loads(response.request.content))
+
+
+async def bench_endpoints(client: httpx.AsyncClient, concurrency: int, requests: int) -> dict[str, dict[str, float]]:
+    """
+    Load tests every endpoint. Every worker plays on its own board, so the board must be big enough for every worker to
+    hit ``requests`` spaces.
+
+    Returns
+    -------
+    results : dict[str, dict[str, float]]
+        Results of ``load`` by endpoint
+    """
+    tracker = BoardTracker()
+    client.event_hooks["response"].append(tracker)
+
+    async def new_board(c: httpx.AsyncClient) -> dict:
+        response = await c.post("/board")
+        response.raise_for_status()
+        return response.json()
+
+    async def nothing(_: httpx.AsyncClient) -> None:
+        return None
+
+    def coords(board: dict, i: int) -> dict[str, int]:
+        return {"x": i // board["settings"]["height"], "y": i % board["settings"]["height"]}
+
+    async def safe_board(c: httpx.AsyncClient) -> tuple[dict, list[dict[str, int]]]:
+        # Batch hits fail if they include a mine, so only the spaces of the columns without mines are hit
+        board = await new_board(c)
+        length, height = board["settings"]["length"], board["settings"]["height"]
+        safe = []
+        for x in range(length):
+            region = {"x": x, "y": 0, "length": 1, "height": height}
+            response = await c.request("GET", "/region", params={"board_id": board["id"]}, json=region)
+            response.raise_for_status()
+            if not response.json()["mines"]:
+                safe.extend({"x": x, "y": y} for y in range(height))
+        return board, safe
+
+    async def board_and_check(c: httpx.AsyncClient, _, __) -> httpx.Response:
+        board = await new_board(c)
+        return await c.post("/check", params={"board_id": board["id"]})
+
+    async def boards_and_check_many(c: httpx.AsyncClient, _, __) -> httpx.Response:
+        response = await c.post("/boards", params={"count": 2})
+        response.raise_for_status()
+        return await c.post("/check_many", json=[board["id"] for board in response.json()["boards"]])
+
+    async def hit(c: httpx.AsyncClient, board: dict, i: int) -> httpx.Response:
+        return await c.post("/hit", params={"board_id": board["id"]}, json=coords(board, i))
+
+    async def flag(c: httpx.AsyncClient, board: dict, _) -> httpx.Response:
+        return await c.post("/flag", params={"board_id": board["id"]}, json={"x": 0, "y": 0})
+
+    async def actions(c: httpx.AsyncClient, board: dict, i: int) -> httpx.Response:
+        body = [{"type": "HIT", **coords(board, i * 10 + j)} for j in range(10)]
+        return await c.post("/actions", params={"board_id": board["id"]}, json=body)
+
+    async def batch_hit(c: httpx.AsyncClient, state: tuple[dict, list[dict[str, int]]], i: int) -> httpx.Response:
+        board, safe = state
+        return await c.post("/batch_hit", params={"board_id": board["id"]}, json=safe[i * 2:i * 2 + 2])
+
+    async def score(c: httpx.AsyncClient, _, __) -> httpx.Response:
+        return await c.get("/score")
+
+    async def pool(c: httpx.AsyncClient, _, __) -> httpx.Response:
+        return await c.get("/pool")
+
+    results = {
+        "score": await load("score", client, concurrency, requests, nothing, score),
+        "pool": await load("pool", client, concurrency, requests, nothing, pool),
+        "board+check": await load("board+check", client, concurrency, requests, nothing, board_and_check),
+        "boards+check_many": await load(
+            "boards+check_many", client, concurrency, requests, nothing, boards_and_check_many
+        ),
+    }
+    for name, setup, call in [
+        ("hit", new_board, hit),
+        ("flag", new_board, flag),
+        ("actions", new_board, actions),
+        ("batch_hit", safe_board, batch_hit),
+    ]:
+        results[name] = await load(name, client, concurrency, requests, setup, call)
+
+        # Frees up the boards of the workers
+        response = await client.post("/check_many", json=list(tracker.board_ids))
+        response.raise_for_status()
+    return results
+
+
+async def run_endpoints(args: argparse.Namespace, env: dict[str, str]) -> dict[str, dict[str, float]]:
+    """
+    Runs ``bench_endpoints`` against the app in-process, or under uvicorn if ``args.uvicorn`` is set.
+    """
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if not args.uvicorn:
+        import main
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(base_url="http://bench", transport=transport, limits=limits) as client:
+            return await bench_endpoints(client, args.concurrency, args.requests)
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=SRC,
+        env={**os.environ, **env}
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits) as client:
+            for _ in range(100):  # Waits for the server to start
+                try:
+                    await client.get("/score")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            return await bench_endpoints(client, args.concurrency, args.requests)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def compare(old: dict, new: dict, prefix: str = "") -> None:
+    """
+    Prints the change of every number between two results.
+    """
+    for key, value in new.items():
+        if isinstance(value, dict) and isinstance(old.get(key), dict):
+            compare(old[key], value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and isinstance(old.get(key), (int, float)) and old[key]:
+            print(f"{prefix}{key}: {old[key]:.6g} -> {value:.6g} ({(value - old[key]) / old[key]:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", type=Path, default=Path("bench.json"), help="File to write results to")
+    parser.add_argument("--compare", type=Path, help="Results of a previous run to compare against")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Board sizes to benchmark")
+    parser.add_argument("--concurrency", type=int, default=20, help="Number of concurrent requests per endpoint")
+    parser.add_argument("--requests", type=int, default=200, help="Number of requests per worker per endpoint")
+    parser.add_argument("--uvicorn", action="store_true", help="Run the app under uvicorn instead of in-process")
+    parser.add_argument("--port", type=int, default=8765, help="Port to run uvicorn on")
+    parser.add_argument("--skip-board", action="store_true", help="Skip the board operation benchmarks")
+    parser.add_argument("--skip-endpoints", action="store_true", help="Skip the endpoint benchmarks")
+    args = parser.parse_args()
+
+    # Every worker needs its own board with room for all of its hits
+    env = zero_latency_env(max_boards=args.concurrency * 2)
+    env["BOARD__LENGTH"] = env["BOARD__HEIGHT"] = str(max(int((args.requests * 10) ** 0.5) + 1, 9))
+    env["BOARD__MINES"] = "10"
+    os.environ.update(env)
+
+    commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=SRC).stdout.strip()
+    results = {
+        "commit": commit,
+        "python": platform.python_version(),
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "server": "uvicorn" if args.uvicorn else "in-process",
+    }
+    if not args.skip_board:
+        results["board"] = bench_board(args.sizes)
+    if not args.skip_endpoints:
+        results["endpoints"] = asyncio.run(run_endpoints(args, env))
+
+    args.output.write_text(json.dumps(results, indent=2))
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+Replays a trace written by the server with ``APP__TRACE_PATH`` against the app, either in-process or under uvicorn, and
+compares the time of every endpoint against the trace.
+
+Requests are sent at their recorded times, sped up by ``--speed`` (0 sends them as fast as possible). A request is
+never sent before the requests of its session that had finished by the time it arrived in the trace, so a session
+sees its requests in the same order even when sped up, while requests that overlapped in the trace still overlap. The
+IDs of the boards given out in the trace are swapped for the IDs of the boards given out in the replay. The app is run
+with the board settings, ``max_boards`` and latency of the trace, so the same coordinates stay on the board.
+
+Run from the root of the repo with:
+    python benchmarks/replay.py trace.ndjson
+    python benchmarks/replay.py trace.ndjson --speed 10 --no-latency --output replay.json
+"""
+import argparse
+import asyncio
+import heapq
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from bench import SRC, zero_latency_env
+
+UUID_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+def read_trace(path: Path) -> tuple[dict, list[dict]]:
+    """
+    Parameters
+    ----------
+    path : Path
+        Trace file
+
+    Returns
+    -------
+    settings, requests : tuple[dict, list[dict]]
+        Settings of the first run in the trace and every request of the trace, in order of arrival
+    """
+    settings, requests = {}, []
+    with path.open("rb") as f:
+        for line in f:
+            entry = json.loads(line)
+            if "settings" in entry:
+                settings = settings or entry["settings"]
+            else:
+                requests.append(entry)
+    requests.sort(key=lambda request: request["time"])
+    return settings, requests
+
+
+def trace_env(settings: dict, no_latency: bool) -> dict[str, str]:
+    """
+    Returns
+    -------
+    env : dict[str, str]
+        Environment variables that give the app the board settings, ``max_boards`` and latency of a trace, or no
+        latency at all if ``no_latency`` is set
+    """
+    if no_latency:
+        env = zero_latency_env(settings["app"]["max_boards"])
+    else:
+        env = {
+            f"LATENCY__{name.upper()}": ",".join(map(str, value)) if isinstance(value, list) else str(value)
+            for name, value in settings["latency"].items()
+        }
+    env["APP__MAX_BOARDS"] = str(settings["app"]["max_boards"])
+    for name, value in settings["board"].items():
+        env[f"BOARD__{name.upper()}"] = str(value)
+    return env
+
+
+class Replay:
+    """
+    Sends the requests of a trace, keeping the order of the requests of each session
+    """
+
+    def __init__(self, client: httpx.AsyncClient, speed: float):
+        """
+        Parameters
+        ----------
+        client : httpx.AsyncClient
+            Client to send requests with
+
+        speed : float
+            How many times faster than recorded to send the requests, 0 sends them as fast as possible
+        """
+        self.client = client
+        self.speed = speed
+
+        self.board_ids: dict[str, str] = {}  # IDs of the replayed boards by the ID of the recorded board
+
+        # Requests of each session by recorded end time, until a later request arrived after they ended
+        self._running: dict[str | None, list[tuple[float, int, asyncio.Future]]] = {}
+        # Done once every request of each session that ended before the last arrival is done
+        self._finished: dict[str | None, asyncio.Future] = {}
+
+    async def run(self, requests: list[dict]) -> list[tuple[int, float]]:
+        """
+        Returns
+        -------
+        results : list[tuple[int, float]]
+            Status code and seconds taken of every request, in the same order as the requests
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        tasks = []
+        for i, request in enumerate(requests):
+            session = request["session"]
+            running = self._running.setdefault(session, [])
+            ended = []
+            while running and running[0][0] <= request["time"]:
+                ended.append(heapq.heappop(running)[2])
+            if ended:
+                previous = [self._finished[session]] if session in self._finished else []
+                self._finished[session] = asyncio.gather(*previous, *ended)
+
+            after = [self._finished[session]] if session in self._finished else []
+            done = loop.create_future()
+            heapq.heappush(running, (request["time"] + request["injected"] + request["compute"], i, done))
+
+            delay = (request["time"] - requests[0]["time"]) / self.speed if self.speed else 0
+            tasks.append(asyncio.create_task(self._send(request, start + delay, after, done)))
+        return await asyncio.gather(*tasks)
+
+    async def _send(
+        self,
+        request: dict,
+        send_at: float,
+        after: list[asyncio.Future],
+        done: asyncio.Future
+    ) -> tuple[int, float]:
+        """
+        Sends a request at its time, once the requests it has to come after are done.
+        """
+        try:
+            await asyncio.sleep(max(send_at - time.perf_counter(), 0))
+            await asyncio.gather(*after)
+
+            headers = {name: request[name] for name in ("session", "accept") if request[name] is not None}
+            if "session" in headers:
+                headers["x-session"] = headers.pop("session")
+
+            url = request["path"] + ("?" + self._swap_ids(request["query"]) if request["query"] else "")
+            start = time.perf_counter()
+            response = await self.client.request(
+                request["method"],
+                url,
+                content=self._swap_ids(request["body"]),
+                headers={"content-type": "application/json", **headers}
+            )
+            seconds = time.perf_counter() - start
+
+            if request.get("boards") and response.is_success:
+                self.board_ids.update(zip(request["boards"], UUID_PATTERN.findall(response.text)))
+            return response.status_code, seconds
+        finally:
+            done.set_result(None)
+
+    def _swap_ids(self, text: str) -> str:
+        return UUID_PATTERN.sub(lambda match: self.board_ids.get(match[0], match[0]), text)
+
+
+def summarize(requests: list[dict], results: list[tuple[int, float]]) -> dict[str, dict[str, float]]:
+    """
+    Returns
+    -------
+    summary : dict[str, dict[str, float]]
+        Number of requests, recorded/replayed p50/p99 latency in milliseconds and number of requests that got a
+        different status code than recorded, by endpoint
+    """
+    def percentiles(seconds: list[float]) -> tuple[float, float]:
+        if len(seconds) < 2:
+            return seconds[0] * 1000, seconds[0] * 1000
+        quantiles = statistics.quantiles(seconds, n=100)
+        return quantiles[49] * 1000, quantiles[98] * 1000
+
+    by_endpoint: dict[str, list[tuple[dict, int, float]]] = {}
+    for request, (status, seconds) in zip(requests, results):
+        by_endpoint.setdefault(request["endpoint"], []).append((request, status, seconds))
+
+    summary = {}
+    for endpoint, replayed in sorted(by_endpoint.items()):
+        recorded = [request["injected"] + request["compute"] for request, _, _ in replayed]
+        recorded_p50, recorded_p99 = percentiles(recorded)
+        replayed_p50, replayed_p99 = percentiles([seconds for _, _, seconds in replayed])
+        summary[endpoint] = {
+            "requests": len(replayed),
+            "recorded_p50_ms": recorded_p50,
+            "recorded_p99_ms": recorded_p99,
+            "replayed_p50_ms": replayed_p50,
+            "replayed_p99_ms": replayed_p99,
+            "status_mismatches": sum(request["status"] != status for request, status, _ in replayed),
+        }
+        print(f"{endpoint}: {summary[endpoint]}", file=sys.stderr)
+    return summary
+
+
+async def run_replay(args: argparse.Namespace, env: dict[str, str], requests: list[dict]) -> list[tuple[int, float]]:
+    """
+    Runs ``Replay`` against the app in-process, or under uvicorn if ``args.uvicorn`` is set.
+    """
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    if not args.uvicorn:
+        sys.path.insert(0, str(SRC))
+        import main
+        transport = httpx.ASGITransport(app=main.app)
+        await main.app.router.startup()
+        try:
+            async with httpx.AsyncClient(base_url="http://replay", transport=transport, limits=limits) as client:
+                return await Replay(client, args.speed).run(requests)
+        finally:
+            await main.app.router.shutdown()
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port), "--log-level", "warning"],
+        cwd=SRC,
+        env={**os.environ, **env}
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits) as client:
+            for _ in range(100):  # Waits for the server to start
+                try:
+                    await client.get("/score")
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            return await Replay(client, args.speed).run(requests)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("trace", type=Path, help="Trace file written by the server")
+    parser.add_argument("--speed", type=float, default=1.0, help="Speed up, 0 sends requests as fast as possible")
+    parser.add_argument("--no-latency", action="store_true", help="Turn off the injected latency of the app")
+    parser.add_argument("--output", type=Path, help="File to write the summary to")
+    parser.add_argument("--connections", type=int, default=100, help="Maximum number of connections")
+    parser.add_argument("--uvicorn", action="store_true", help="Run the app under uvicorn instead of in-process")
+    parser.add_argument("--port", type=int, default=8766, help="Port to run uvicorn on")
+    args = parser.parse_args()
+
+    settings, requests = read_trace(args.trace)
+    if not requests:
+        sys.exit(f"No requests in {args.trace}")
+
+    env = trace_env(settings, args.no_latency)
+    os.environ.update(env)
+
+    start = time.perf_counter()
+    results = asyncio.run(run_replay(args, env, requests))
+    print(f"Replayed {len(requests)} requests in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    summary = summarize(requests, results)
+    if args.output:
+        args.output.write_text(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
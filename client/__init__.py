@@ -0,0 +1,14 @@
+from client.client import MinesweeperClient, MinesweeperError
+from client.models import (
+    Action,
+    ActionResult,
+    ActionType,
+    Board,
+    BoardScore,
+    BoardSettings,
+    CheckResults,
+    NewBoards,
+    PoolStats,
+    Space,
+    SpaceType,
+)
@@ -0,0 +1,562 @@
+import asyncio
+import json
+from typing import Any, Iterable
+from uuid import UUID
+
+import httpx
+
+from client.models import Action, ActionResult, Board, CheckResults, NewBoards, PoolStats, RegionStats, Space
+
+BACKPRESSURE_DETAIL = "Cannot provide another board"  # Start of the error detail when there are no boards available
+NOT_FOUND_DETAIL = "Board not found!"  # Error detail when a board is not outstanding, like after it was evicted
+
+
+class MinesweeperError(Exception):
+    """
+    Error response from the server
+    """
+
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(f"{status_code}: {detail}")
+        self.status_code = status_code
+        self.detail = detail
+
+    @property
+    def board_not_found(self) -> bool:
+        """
+        Returns
+        -------
+        result : bool
+            True if the error is because a board is not outstanding on the server
+        """
+        return self.status_code == 400 and self.detail == NOT_FOUND_DETAIL
+
+
+class MinesweeperClient:
+    """
+    Async client for the game server. Keeps a pool of keep-alive connections open, and limits the number of boards it
+    holds at once to the ``max_boards`` of the server, so that callers can start as many boards as they want
+    concurrently and just wait for a free board.
+
+    Use as an async context manager, or call ``close`` when done::
+
+        async with MinesweeperClient() as client:
+            board = await client.board()
+            await client.hit(board.id, 0, 0)
+            score = await client.check(board.id)
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:8000",
+        max_boards: int = 5,
+        max_connections: int = 100,
+        retry_delay: float = 0.01,
+        max_retry_delay: float = 1.0,
+        session: str | None = None,
+        transport: httpx.AsyncBaseTransport | None = None
+    ):
+        """
+        Parameters
+        ----------
+        base_url : str
+            URL of the game server
+
+        max_boards : int
+            Maximum number of boards to hold at once, should match ``AppSettings.max_boards`` of the server
+
+        max_connections : int
+            Maximum number of connections to keep open to the server
+
+        retry_delay : float
+            Seconds to wait before asking for a board again when the server has none available. Doubles on every retry.
+
+        max_retry_delay : float
+            Maximum number of seconds to wait between asking for a board
+
+        session : str | None
+            Session key, so the client gets its own score and boards on the server. Uses the shared default session if
+            not provided.
+
+        transport : httpx.AsyncBaseTransport | None
+            Transport to send requests with, like ``httpx.ASGITransport`` to call the app in-process
+        """
+        self.max_boards = max_boards
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self._board_slots = asyncio.Semaphore(max_boards)
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=None,
+            headers={"X-Session": session} if session else None,
+            transport=transport
+        )
+
+    async def __aenter__(self) -> "MinesweeperClient":
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Closes all connections to the server.
+        """
+        await self._http.aclose()
+
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """
+        Sends a request to the server.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method
+
+        path : str
+            Endpoint to call
+
+        kwargs
+            Passed through to ``httpx.AsyncClient.request``
+
+        Returns
+        -------
+        response : httpx.Response
+            Response of the server, or will raise a ``MinesweeperError`` if the server returned an error
+        """
+        response = await self._http.request(method, path, **kwargs)
+        if response.is_error:
+            try:
+                detail = response.json()["detail"]
+            except (ValueError, KeyError):
+                detail = response.text
+            raise MinesweeperError(response.status_code, detail)
+        return response
+
+    async def _request(self, method: str, path: str, **kwargs) -> Any:
+        """
+        Sends a request to the server and decodes its JSON response.
+
+        Parameters
+        ----------
+        method : str
+            HTTP method
+
+        path : str
+            Endpoint to call
+
+        kwargs
+            Passed through to ``httpx.AsyncClient.request``
+
+        Returns
+        -------
+        body : Any
+            Decoded JSON response body, or will raise a ``MinesweeperError`` if the server returned an error
+        """
+        return (await self._send(method, path, **kwargs)).json()
+
+    async def _request_boards(self, path: str, **kwargs) -> Any:
+        """
+        Asks the server for boards, retrying with exponential backoff while the server has none available.
+
+        Parameters
+        ----------
+        path : str
+            Endpoint to call
+
+        kwargs
+            Passed through to ``httpx.AsyncClient.request``
+
+        Returns
+        -------
+        body : Any
+            Decoded JSON response body
+        """
+        delay = self.retry_delay
+        while True:
+            try:
+                return await self._request("POST", path, **kwargs)
+            except MinesweeperError as e:
+                if not str(e.detail).startswith(BACKPRESSURE_DETAIL):
+                    raise
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    async def score(self) -> int:
+        """
+        Returns
+        -------
+        score : int
+            Current score
+        """
+        return (await self._request("GET", "/score"))["score"]
+
+    async def pool(self) -> PoolStats:
+        """
+        Returns
+        -------
+        stats : PoolStats
+            Usage counters of the board pool of the server
+        """
+        return PoolStats.parse_obj(await self._request("GET", "/pool"))
+
+    async def board(self) -> Board:
+        """
+        Gets a new board. Waits until this client holds less than ``max_boards`` boards, and retries while the server
+        has no boards available.
+
+        Returns
+        -------
+        board : Board
+            New board
+        """
+        await self._board_slots.acquire()
+        try:
+            return Board.parse_obj(await self._request_boards("/board"))
+        except BaseException:
+            self._board_slots.release()
+            raise
+
+    async def boards(self, count: int) -> NewBoards:
+        """
+        Gets up to ``count`` new boards at once. Waits until at least 1 board can be held, and only asks for as many
+        boards as this client can hold.
+
+        Parameters
+        ----------
+        count : int
+            Maximum number of boards to get
+
+        Returns
+        -------
+        new_boards : NewBoards
+            New boards and the current score
+        """
+        await self._board_slots.acquire()
+        slots = 1
+        while slots < count and not self._board_slots.locked():
+            await self._board_slots.acquire()
+            slots += 1
+
+        try:
+            new_boards = NewBoards.parse_obj(await self._request_boards("/boards", params={"count": slots}))
+        except BaseException:
+            for _ in range(slots):
+                self._board_slots.release()
+            raise
+
+        for _ in range(slots - len(new_boards.boards)):
+            self._board_slots.release()
+        return new_boards
+
+    async def hit(self, board_id: UUID, x: int, y: int) -> Space:
+        """
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to hit the space on
+
+        x : int
+        y : int
+            Coordinates of the space to hit
+
+        Returns
+        -------
+        space : Space
+            Space that was hit
+        """
+        return Space.parse_obj(
+            await self._request("POST", "/hit", params={"board_id": str(board_id)}, json={"x": x, "y": y})
+        )
+
+    async def reveal(self, board_id: UUID, x: int, y: int) -> tuple[list[Space], bool]:
+        """
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to hit the space on
+
+        x : int
+        y : int
+            Coordinates of the space to start from
+
+        Returns
+        -------
+        spaces, truncated : tuple[list[Space], bool]
+            Every space that was hit, the connected blank spaces and their borders if the space was blank, and whether
+            the server stopped before the whole area was hit. The rest of the area can be revealed from the spaces that
+            are still not hit around the blank spaces that were.
+        """
+        response = await self._send("POST", "/reveal", params={"board_id": str(board_id)}, json={"x": x, "y": y})
+        truncated = response.headers.get("x-reveal-truncated") == "true"
+        return [Space.parse_obj(space) for space in response.json()], truncated
+
+    async def batch_hit(self, board_id: UUID, spaces: Iterable[tuple[int, int]]) -> list[Space]:
+        """
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to hit the spaces on
+
+        spaces : Iterable[tuple[int, int]]
+            Coordinates of the spaces to hit
+
+        Returns
+        -------
+        spaces : list[Space]
+            Spaces that were hit
+        """
+        body = await self._request(
+            "POST",
+            "/batch_hit",
+            params={"board_id": str(board_id)},
+            json=[{"x": x, "y": y} for x, y in spaces]
+        )
+        return [Space.parse_obj(space) for space in body]
+
+    async def flag(self, board_id: UUID, x: int, y: int) -> Space:
+        """
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to toggle the flag on
+
+        x : int
+        y : int
+            Coordinates of the space to toggle the flag on
+
+        Returns
+        -------
+        space : Space
+            Coordinates and flag status of the space
+        """
+        return Space.parse_obj(
+            await self._request("POST", "/flag", params={"board_id": str(board_id)}, json={"x": x, "y": y})
+        )
+
+    async def actions(self, board_id: UUID, actions: Iterable[Action]) -> list[ActionResult]:
+        """
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to apply the actions on
+
+        actions : Iterable[Action]
+            Hits/flags to apply, in order
+
+        Returns
+        -------
+        results : list[ActionResult]
+            Result of each action, in the same order as the actions
+        """
+        body = await self._request(
+            "POST",
+            "/actions",
+            params={"board_id": str(board_id)},
+            json=[action.dict() for action in actions]
+        )
+        return [ActionResult.parse_obj(result) for result in body]
+
+    async def check(self, board_id: UUID) -> int:
+        """
+        Checks a board and frees up its space for a new board. The space is also freed if the server no longer has the
+        board, like after the session was evicted, before the error is raised.
+
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to check
+
+        Returns
+        -------
+        score : int
+            Current score after checking
+        """
+        try:
+            score = (await self._request("POST", "/check", params={"board_id": str(board_id)}))["score"]
+        except MinesweeperError as e:
+            if e.board_not_found:
+                self._board_slots.release()
+            raise
+        self._board_slots.release()
+        return score
+
+    async def check_many(self, board_ids: Iterable[UUID]) -> CheckResults:
+        """
+        Checks several boards at once and frees up their spaces for new boards. If the server no longer has some of
+        the boards, none of them are checked by the server, so the boards are checked one at a time instead and the
+        ones the server does not have are left out of the results (their spaces are freed all the same).
+
+        Parameters
+        ----------
+        board_ids : Iterable[UUID]
+            IDs of the boards to check
+
+        Returns
+        -------
+        results : CheckResults
+            Points each board was worth and the current score after checking
+        """
+        board_ids = list(dict.fromkeys(board_ids))
+        try:
+            results = CheckResults.parse_obj(
+                await self._request("POST", "/check_many", json=[str(board_id) for board_id in board_ids])
+            )
+        except MinesweeperError as e:
+            if not e.board_not_found or len(board_ids) == 1:
+                if e.board_not_found:
+                    self._board_slots.release()
+                raise
+            return await self._check_each(board_ids)
+
+        for _ in results.boards:
+            self._board_slots.release()
+        return results
+
+    async def _check_each(self, board_ids: list[UUID]) -> CheckResults:
+        """
+        Checks boards one at a time, skipping the boards the server does not have.
+
+        Parameters
+        ----------
+        board_ids : list[UUID]
+            IDs of the boards to check
+
+        Returns
+        -------
+        results : CheckResults
+            Points each board that was found was worth and the current score after checking, or will raise the error
+            of the last board if none of the boards were found
+        """
+        results, error = [], None
+        for board_id in board_ids:
+            try:
+                results.append(await self.check_many([board_id]))
+            except MinesweeperError as e:
+                if not e.board_not_found:
+                    raise
+                error = e
+
+        if not results:
+            raise error
+        return CheckResults(boards=[board for result in results for board in result.boards], score=results[-1].score)
+
+    async def is_space_blank(self, board_id: UUID, x: int, y: int) -> bool:
+        """
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board the space is on
+
+        x : int
+        y : int
+            Coordinates of the space to ask about
+
+        Returns
+        -------
+        answer : bool
+            True if the space is not a mine and has no mines around it
+        """
+        body = await self._request("GET", "/is_space_blank", params={"board_id": str(board_id)}, json={"x": x, "y": y})
+        return body["answer"]
+
+    async def is_space_a_mine(self, board_id: UUID, x: int, y: int) -> bool:
+        """
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board the space is on
+
+        x : int
+        y : int
+            Coordinates of the space to ask about
+
+        Returns
+        -------
+        answer : bool
+            True if the space is a mine
+        """
+        body = await self._request("GET", "/is_space_a_mine", params={"board_id": str(board_id)}, json={"x": x, "y": y})
+        return body["answer"]
+
+    async def mines_in_region(self, board_id: UUID, x: int, y: int, length: int, height: int) -> int:
+        """
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to ask about
+
+        x : int
+        y : int
+        length : int
+        height : int
+            Rectangle to count in, from x, y to x + length - 1, y + height - 1
+
+        Returns
+        -------
+        mines : int
+            Number of mines in the rectangle
+        """
+        region = {"x": x, "y": y, "length": length, "height": height}
+        body = await self._request("GET", "/mines_in_region", params={"board_id": str(board_id)}, json=region)
+        return body["answer"]
+
+    async def region(self, board_id: UUID, x: int, y: int, length: int, height: int) -> RegionStats:
+        """
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to ask about
+
+        x : int
+        y : int
+        length : int
+        height : int
+            Rectangle to count in, from x, y to x + length - 1, y + height - 1
+
+        Returns
+        -------
+        stats : RegionStats
+            Mines, sum of the values of the safe spaces, and hit/flagged spaces in the rectangle
+        """
+        region = {"x": x, "y": y, "length": length, "height": height}
+        return RegionStats.parse_obj(
+            await self._request("GET", "/region", params={"board_id": str(board_id)}, json=region)
+        )
+
+    async def count_unhit_safe(self, board_id: UUID) -> int:
+        """
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to ask about
+
+        Returns
+        -------
+        count : int
+            Number of safe spaces on the board that have not been hit yet
+        """
+        return (await self._request("GET", "/count_unhit_safe", params={"board_id": str(board_id)}))["answer"]
+
+    async def state(self, board_id: UUID, since: int = 0) -> tuple[int, list[Space]]:
+        """
+        Gets the hit and flagged spaces of a board, or only the spaces that changed after a version of the board.
+
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to get the state of
+
+        since : int
+            Version of the board from a previous call to get the changes after, 0 gets every hit/flagged space
+
+        Returns
+        -------
+        version, spaces : tuple[int, list[Space]]
+            Current version of the board, to pass as ``since`` next time, and the spaces in order of x then y
+        """
+        response = await self._send("GET", f"/board/{board_id}/state", params={"since": since})
+        spaces = [Space.parse_obj(space) for line in response.iter_lines() if line for space in json.loads(line)]
+        return int(response.headers["x-board-version"]), spaces
@@ -0,0 +1,87 @@
+from enum import StrEnum
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class BoardSettings(BaseModel):
+    length: int
+    height: int
+    mines: int
+
+
+class Board(BaseModel):
+    """
+    A board that was given out by /board or /boards. Only the ID and settings of the board are given out.
+    """
+    id: UUID
+    settings: BoardSettings
+
+
+class SpaceType(StrEnum):
+    BLANK = "BLANK"  # Non-mine space with no mines in immediate proximity
+    VALUE = "VALUE"  # Non-mine space with at least 1 mine in immediate proximity
+    MINE = "MINE"  # Mine space
+
+
+class Space(BaseModel):
+    """
+    A space returned by the server. Fields that the server did not give out are None, like the value of a flagged space.
+    """
+    x: int
+    y: int
+    value: int | None = None
+    type: SpaceType | None = None
+    hit: bool | None = None
+    flagged: bool | None = None
+
+
+class ActionType(StrEnum):
+    HIT = "HIT"
+    FLAG = "FLAG"
+
+
+class Action(BaseModel):
+    """
+    A hit or flag to send to /actions
+    """
+    type: ActionType
+    x: int
+    y: int
+
+
+class ActionResult(BaseModel):
+    space: Space | None = None
+    error: str | None = None
+
+
+class BoardScore(BaseModel):
+    board_id: UUID
+    score: float
+
+
+class CheckResults(BaseModel):
+    boards: list[BoardScore]
+    score: int
+
+
+class NewBoards(BaseModel):
+    boards: list[Board]
+    score: int
+
+
+class RegionStats(BaseModel):
+    """
+    Counts for a rectangle of a board, see /region
+    """
+    mines: int
+    value: int  # Sum of the values of the safe spaces
+    hits: int
+    flags: int
+
+
+class PoolStats(BaseModel):
+    size: int
+    ready: int
+    hits: int
+    misses: int
@@ -0,0 +1,335 @@
+"""
+Constraint propagation solver. Deduces safe spaces and mines from the values of revealed spaces, and only guesses when
+nothing can be deduced. Each board gets a time budget, once it runs out the board is flagged by mine probability and
+checked, trading accuracy for speed.
+
+Run from the root of the repo with: python -m client.solver --boards 100 --time-budget 0.5
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+
+from pydantic import BaseModel
+
+from client.client import MinesweeperClient
+from client.models import Action, ActionType, Board, SpaceType
+
+Coords = tuple[int, int]
+
+
+class SolveResult(BaseModel):
+    """
+    Outcome of solving a single board
+    """
+    board_id: str
+    score: float  # Points the board was worth when checked
+    guesses: int  # Number of spaces that were hit without being deduced as safe
+    mines_hit: int  # Number of guesses that turned out to be mines
+    out_of_time: bool  # True if the board was checked because the time budget ran out
+    seconds: float
+
+
+class BoardKnowledge:
+    """
+    What is known about a single board. Every space is either revealed (hit and safe), a known mine (flagged or hit),
+    deduced safe but not yet hit, or unknown.
+    """
+
+    def __init__(self, length: int, height: int, mines: int, rng: random.Random | None = None):
+        self.length = length
+        self.height = height
+        self.mines = mines
+        self.rng = rng or random.Random()
+
+        self.revealed: dict[Coords, int] = {}  # Safe spaces that were hit, with their value
+        self.known_mines: set[Coords] = set()
+        self.flagged: set[Coords] = set()
+        self.unknown: set[Coords] = set(itertools.product(range(length), range(height)))
+
+        self.to_hit: set[Coords] = set()  # Deduced safe, not hit yet
+        self.to_flag: set[Coords] = set()  # Deduced mines, not flagged yet
+
+        self._dirty: set[Coords] = set()  # Revealed spaces whose neighbors changed since they were last looked at
+
+    def neighbors(self, coords: Coords) -> list[Coords]:
+        x, y = coords
+        return [
+            (nx, ny)
+            for nx in range(max(x - 1, 0), min(x + 2, self.length))
+            for ny in range(max(y - 1, 0), min(y + 2, self.height))
+            if (nx, ny) != coords
+        ]
+
+    def _touch(self, coords: Coords) -> None:
+        """
+        Marks the revealed neighbors of a space as needing another look
+        """
+        self._dirty.update(n for n in self.neighbors(coords) if n in self.revealed)
+
+    def mark_safe(self, coords: Coords) -> None:
+        if coords in self.unknown:
+            self.unknown.discard(coords)
+            self.to_hit.add(coords)
+            self._touch(coords)
+
+    def mark_mine(self, coords: Coords) -> None:
+        if coords in self.unknown:
+            self.unknown.discard(coords)
+            self.known_mines.add(coords)
+            self.to_flag.add(coords)
+            self._touch(coords)
+
+    def reveal(self, coords: Coords, type_: SpaceType, value: int) -> None:
+        """
+        Records the result of hitting a space
+        """
+        self.unknown.discard(coords)
+        self.to_hit.discard(coords)
+        if type_ == SpaceType.MINE:
+            self.known_mines.add(coords)
+        else:
+            self.revealed[coords] = value
+            self._dirty.add(coords)
+        self._touch(coords)
+
+    def _constraint(self, coords: Coords) -> tuple[set[Coords], int]:
+        """
+        Returns
+        -------
+        unknown, remaining : tuple[set[Coords], int]
+            Unknown neighbors of a revealed space, and the number of mines that must be among them
+        """
+        unknown, mines = set(), 0
+        for n in self.neighbors(coords):
+            if n in self.unknown:
+                unknown.add(n)
+            elif n in self.known_mines:
+                mines += 1
+        return unknown, self.revealed[coords] - mines
+
+    def _apply(self, unknown: set[Coords], remaining: int) -> bool:
+        """
+        Applies a constraint if it fully determines its spaces. Returns True if anything was deduced.
+        """
+        if not unknown:
+            return False
+        if remaining == 0:
+            for coords in unknown:
+                self.mark_safe(coords)
+            return True
+        if remaining == len(unknown):
+            for coords in unknown:
+                self.mark_mine(coords)
+            return True
+        return False
+
+    def _frontier(self) -> list[tuple[set[Coords], int]]:
+        """
+        Returns
+        -------
+        constraints : list[tuple[set[Coords], int]]
+            Constraint of every revealed space that still has unknown neighbors
+        """
+        constraints = []
+        for coords in self.revealed:
+            unknown, remaining = self._constraint(coords)
+            if unknown:
+                constraints.append((unknown, remaining))
+        return constraints
+
+    def deduce(self) -> bool:
+        """
+        Runs single space constraints over the spaces that changed, then the subset rule over the frontier, then the
+        global mine count. Returns True if anything was deduced.
+        """
+        progress = False
+        while self._dirty:
+            coords = self._dirty.pop()
+            progress |= self._apply(*self._constraint(coords))
+        if progress:
+            return True
+
+        # Subset rule: if A's unknowns are a subset of B's, then B's other unknowns hold the difference in mines
+        constraints = self._frontier()
+        by_space: dict[Coords, list[int]] = {}
+        for i, (unknown, _) in enumerate(constraints):
+            for coords in unknown:
+                by_space.setdefault(coords, []).append(i)
+        for i, (unknown_a, remaining_a) in enumerate(constraints):
+            candidates = {j for coords in unknown_a for j in by_space[coords] if j != i}
+            for j in candidates:
+                unknown_b, remaining_b = constraints[j]
+                if len(unknown_a) < len(unknown_b) and unknown_a <= unknown_b:
+                    # Constraints are stale once anything is deduced, so they are rebuilt on the next call
+                    if self._apply(unknown_b - unknown_a, remaining_b - remaining_a):
+                        return True
+
+        remaining_mines = self.mines - len(self.known_mines)
+        return self._apply(set(self.unknown), remaining_mines)
+
+    def mine_probabilities(self) -> dict[Coords, float]:
+        """
+        Rough chance of each unknown space being a mine. Spaces next to revealed spaces take the highest ratio of
+        remaining mines to unknown neighbors, every other space takes the overall density of remaining mines.
+        """
+        density = (self.mines - len(self.known_mines)) / max(len(self.unknown), 1)
+        probabilities = dict.fromkeys(self.unknown, density)
+        seen = set()
+        for unknown, remaining in self._frontier():
+            for coords in unknown:
+                ratio = remaining / len(unknown)
+                probabilities[coords] = max(probabilities[coords], ratio) if coords in seen else ratio
+                seen.add(coords)
+        return probabilities
+
+    def guess(self) -> Coords:
+        """
+        Returns
+        -------
+        coords : Coords
+            Unknown space that is least likely to be a mine
+        """
+        probabilities = self.mine_probabilities()
+        lowest = min(probabilities.values())
+        return self.rng.choice([coords for coords, p in probabilities.items() if p == lowest])
+
+    def likely_mines(self) -> list[Coords]:
+        """
+        Returns
+        -------
+        spaces : list[Coords]
+            Unknown spaces to flag when out of time, most likely mines first, limited to the flags left
+        """
+        flags_left = self.mines - len(self.flagged) - len(self.to_flag)
+        probabilities = self.mine_probabilities()
+        return sorted(probabilities, key=probabilities.get, reverse=True)[:max(flags_left, 0)]
+
+
+async def solve_board(
+    client: MinesweeperClient,
+    board: Board,
+    time_budget: float,
+    rng: random.Random | None = None
+) -> SolveResult:
+    """
+    Solves a board and checks it.
+
+    Parameters
+    ----------
+    client : MinesweeperClient
+        Client to play with
+
+    board : Board
+        Board to solve, must already be given out to the client
+
+    time_budget : float
+        Seconds to spend on the board before flagging the likely mines and checking it
+
+    rng : random.Random | None
+        Random source for guesses
+
+    Returns
+    -------
+    result : SolveResult
+        Outcome of the board
+    """
+    start = time.perf_counter()
+    settings = board.settings
+    knowledge = BoardKnowledge(settings.length, settings.height, settings.mines, rng)
+    guesses = mines_hit = 0
+    out_of_time = False
+
+    while knowledge.unknown or knowledge.to_hit or knowledge.to_flag:
+        if time.perf_counter() - start > time_budget:
+            out_of_time = True
+            knowledge.to_flag.update(knowledge.likely_mines())
+            knowledge.to_hit.clear()
+        elif not knowledge.deduce() and not knowledge.to_hit and not knowledge.to_flag:
+            guess = knowledge.guess()
+            knowledge.unknown.discard(guess)
+            knowledge.to_hit.add(guess)
+            guesses += 1
+
+        hits, flags = sorted(knowledge.to_hit), sorted(knowledge.to_flag)
+        knowledge.to_hit.clear()
+        knowledge.to_flag.clear()
+        if hits or flags:
+            results = await client.actions(board.id, itertools.chain(
+                (Action(type=ActionType.FLAG, x=x, y=y) for x, y in flags),
+                (Action(type=ActionType.HIT, x=x, y=y) for x, y in hits)
+            ))
+            for coords, result in zip(flags, results):
+                if result.space and result.space.flagged:
+                    knowledge.flagged.add(coords)
+            for coords, result in zip(hits, results[len(flags):]):
+                if result.space:
+                    mines_hit += result.space.type == SpaceType.MINE
+                    knowledge.reveal(coords, result.space.type, result.space.value)
+
+        if out_of_time:
+            break
+
+    checked = await client.check_many([board.id])
+    return SolveResult(
+        board_id=str(board.id),
+        score=checked.boards[0].score,
+        guesses=guesses,
+        mines_hit=mines_hit,
+        out_of_time=out_of_time,
+        seconds=time.perf_counter() - start
+    )
+
+
+async def solve_boards(client: MinesweeperClient, boards: int, time_budget: float) -> list[SolveResult]:
+    """
+    Solves boards concurrently, as many at once as the client can hold.
+
+    Parameters
+    ----------
+    client : MinesweeperClient
+        Client to play with
+
+    boards : int
+        Number of boards to solve
+
+    time_budget : float
+        Seconds to spend on each board
+
+    Returns
+    -------
+    results : list[SolveResult]
+        Outcome of every board
+    """
+    async def solve_one() -> SolveResult:
+        return await solve_board(client, await client.board(), time_budget)
+
+    return await asyncio.gather(*(solve_one() for _ in range(boards)))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--boards", type=int, default=100, help="Number of boards to solve")
+    parser.add_argument("--time-budget", type=float, default=1.0, help="Seconds to spend on each board")
+    parser.add_argument("--max-boards", type=int, default=5, help="Should match AppSettings.max_boards of the server")
+    parser.add_argument("--session", help="Session key, to keep the score separate from other players")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    async with MinesweeperClient(args.url, max_boards=args.max_boards, session=args.session) as client:
+        results = await solve_boards(client, args.boards, args.time_budget)
+        score = await client.score()
+    seconds = time.perf_counter() - start
+
+    print(f"Boards: {len(results)} in {seconds:.2f}s ({len(results) / seconds:.2f} boards/s)")
+    print(f"Mean board score: {sum(r.score for r in results) / len(results):.2f}")
+    print(f"Mean guesses: {sum(r.guesses for r in results) / len(results):.2f}")
+    print(f"Mean mines hit: {sum(r.mines_hit for r in results) / len(results):.2f}")
+    print(f"Out of time: {sum(r.out_of_time for r in results)}")
+    print(f"Score: {score}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,38 @@
+"""
+Same as the sync inaccurate strategy, but uses the async client to play as many boards at once as the server allows,
+sending all hits/flags for a board in a single /actions request.
+
+Run from the root of the repo with: python -m examples.async_client_inaccurate
+"""
+import asyncio
+import itertools
+import random
+
+from client import Action, ActionType, MinesweeperClient
+
+
+async def play(client: MinesweeperClient) -> int:
+    board = await client.board()
+    settings = board.settings
+
+    available_coordinates = list(itertools.product(range(settings.length), range(settings.height)))
+    flag_spots = [
+        available_coordinates.pop(random.randint(0, len(available_coordinates) - 1))
+        for _ in range(settings.mines)
+    ]
+    await client.actions(board.id, itertools.chain(
+        (Action(type=ActionType.FLAG, x=x, y=y) for x, y in flag_spots),
+        (Action(type=ActionType.HIT, x=x, y=y) for x, y in available_coordinates)
+    ))
+    return await client.check(board.id)
+
+
+async def main():
+    async with MinesweeperClient() as client:
+        while True:
+            scores = await asyncio.gather(*(play(client) for _ in range(client.max_boards)))
+            print(f"Current score: {max(scores)}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,145 @@
+import asyncio
+import contextvars
+from time import perf_counter
+from uuid import UUID
+
+from fastapi import HTTPException
+
+import helpers
+from metrics import record_injected_latency
+from models import Action, ActionType, BoardSpace
+from settings import LatencySettings, LatencyValue
+from state import MemoryState, SQLiteState
+
+PendingAction = tuple[Action, asyncio.Future]
+
+
+class Dispatcher:
+    """
+    Coalesces hits/flags on the same board. Actions that arrive within ``window`` seconds of the first one are applied
+    together in a single pass over the board, and every action of the same type shares a single latency sleep. Each
+    action still gets its own result or error, and failed actions return right away, same as without coalescing.
+    """
+
+    def __init__(self, state: MemoryState | SQLiteState, latency: LatencySettings, window: float):
+        """
+        Parameters
+        ----------
+        state : MemoryState | SQLiteState
+            State to look up sessions/boards in
+
+        latency : LatencySettings
+            Latency of hits and flags
+
+        window : float
+            Seconds to wait for more actions on a board before applying them
+        """
+        self.state = state
+        self.latency = latency
+        self.window = window
+
+        self._pending: dict[tuple[str | None, UUID], list[PendingAction]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, session_key: str | None, board_id: UUID, action: Action) -> BoardSpace:
+        """
+        Queues an action on a board and waits for its result.
+
+        Parameters
+        ----------
+        session_key : str | None
+            Session key, or None for the default session
+
+        board_id : UUID
+            ID of the board to apply the action to
+
+        action : Action
+            Hit or flag to apply
+
+        Returns
+        -------
+        space : BoardSpace
+            Space after the action, or will raise a `HTTPException` if the action failed
+        """
+        loop = asyncio.get_running_loop()
+        key = (session_key, board_id)
+        if key not in self._pending:
+            self._pending[key] = []
+            # Runs outside the context of this request, so the shared sleep isn't counted as only this request's latency
+            loop.call_later(self.window, self._flush, key, context=contextvars.Context())
+
+        future = loop.create_future()
+        self._pending[key].append((action, future))
+        space, slept = await future
+        record_injected_latency(slept)
+        return space
+
+    def _flush(self, key: tuple[str | None, UUID]) -> None:
+        task = asyncio.create_task(self._apply(key, self._pending.pop(key)))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _apply(self, key: tuple[str | None, UUID], pending: list[PendingAction]) -> None:
+        """
+        Applies every pending action on a board in order, then resolves them after a shared sleep for each action type.
+        """
+        session_key, board_id = key
+        done: dict[ActionType, list[tuple[asyncio.Future, BoardSpace]]] = {ActionType.HIT: [], ActionType.FLAG: []}
+        try:
+            with self.state.session(session_key) as session:
+                board = session.boards.get(board_id)
+                for action, future in pending:
+                    space = BoardSpace(x=action.x, y=action.y)
+                    try:
+                        match action.type:
+                            case ActionType.HIT:
+                                space = helpers.hit_space(space, board)
+                            case ActionType.FLAG:
+                                space = helpers.flag_space(space, board)
+                    except HTTPException as e:
+                        if not future.done():
+                            future.set_exception(e)
+                        continue
+                    done[action.type].append((future, space))
+        except Exception as e:
+            # Anything else, like a database error, rolled back the whole transaction, so none of the actions applied
+            self._fail(pending, e)
+            return
+
+        try:
+            await asyncio.gather(
+                self._resolve(self.latency.hit, done[ActionType.HIT]),
+                self._resolve(self.latency.flag, done[ActionType.FLAG])
+            )
+        except Exception as e:
+            self._fail(pending, e)
+
+    @staticmethod
+    def _fail(pending: list[PendingAction], error: Exception) -> None:
+        """
+        Raises an error out of every pending action that is not resolved yet, so that no caller is left waiting.
+        """
+        for _, future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    @staticmethod
+    async def _resolve(latency: LatencyValue, done: list[tuple[asyncio.Future, BoardSpace]]) -> None:
+        """
+        Sleeps once for a group of applied actions, then resolves all of them.
+        """
+        if not done:
+            return
+
+        start = perf_counter()
+        await helpers.wait_for(latency)
+        slept = perf_counter() - start
+        for future, space in done:
+            if not future.done():
+                future.set_result((space, slept))
+
+    async def stop(self) -> None:
+        """
+        Waits for the actions that are being applied
+        """
+        await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,217 @@
+import struct
+from typing import Generator, Iterable
+
+import orjson
+from fastapi import Request, Response
+
+from models import ActionResult, BoardSpace, BoardSpaceType, CELL_FLAGGED, CELL_HIT, CELL_MINE, CELL_VALUE
+
+SPACES_MEDIA_TYPE = "application/x-minesweeper-spaces"
+ROWS_MEDIA_TYPE = "application/x-ndjson"  # A line with a JSON list of spaces for every row, see ``encode_cell_rows``
+
+# Each space is packed as a little-endian record of: x, y, value, type, flags
+SPACE_RECORD = struct.Struct("<iiBBB")
+
+UNKNOWN_VALUE = 0xFF  # Sent as the value when the value of a space is not given out, like for /flag
+TYPE_CODES = {
+    None: 0,
+    BoardSpaceType.BLANK: 1,
+    BoardSpaceType.VALUE: 2,
+    BoardSpaceType.MINE: 3,
+}
+FLAG_HIT = 0b001
+FLAG_FLAGGED = 0b010
+FLAG_FAILED = 0b100  # The action on this space failed, only used for /actions
+
+
+def encode_space(space: BoardSpace, flags: int = 0) -> bytes:
+    """
+    Packs a space into a single binary record.
+
+    Parameters
+    ----------
+    space : BoardSpace
+        Space to pack
+
+    flags : int
+        Extra flag bits to set on the record
+
+    Returns
+    -------
+    record : bytes
+        Packed space, see ``SPACE_RECORD``
+    """
+    if space.hit:
+        flags |= FLAG_HIT
+    if space.flagged:
+        flags |= FLAG_FLAGGED
+
+    return SPACE_RECORD.pack(
+        space.x,
+        space.y,
+        UNKNOWN_VALUE if space.value is None else space.value,
+        TYPE_CODES[space.type],
+        flags
+    )
+
+
+def encode_spaces(spaces: Iterable[BoardSpace]) -> bytes:
+    """
+    Packs spaces into back-to-back binary records.
+
+    Parameters
+    ----------
+    spaces : Iterable[BoardSpace]
+        Spaces to pack
+
+    Returns
+    -------
+    records : bytes
+        Packed spaces, see ``SPACE_RECORD``
+    """
+    return b"".join(encode_space(space) for space in spaces)
+
+
+def encode_action_results(actions: Iterable[BoardSpace], results: Iterable[ActionResult]) -> bytes:
+    """
+    Packs the results of /actions into back-to-back binary records. Failed actions are sent as a record with the
+    coordinates of the action and ``FLAG_FAILED`` set. The reason an action failed is only available in JSON.
+
+    Parameters
+    ----------
+    actions : Iterable[BoardSpace]
+        Coordinates of each action
+
+    results : Iterable[ActionResult]
+        Result of each action
+
+    Returns
+    -------
+    records : bytes
+        Packed results, see ``SPACE_RECORD``
+    """
+    return b"".join(
+        encode_space(result.space) if result.space else encode_space(action, flags=FLAG_FAILED)
+        for action, result in zip(actions, results)
+    )
+
+
+def _cell_fields(cell: int) -> tuple[int | None, BoardSpaceType | None, bool, bool]:
+    """
+    Returns
+    -------
+    value, type, hit, flagged : tuple[int | None, BoardSpaceType | None, bool, bool]
+        Fields of a space from its cell bits. The value and type are only given out if it was hit, same as /hit and
+        /flag
+    """
+    if not cell & CELL_HIT:
+        return None, None, False, bool(cell & CELL_FLAGGED)
+    if cell & CELL_MINE:
+        return 1, BoardSpaceType.MINE, True, False  # For obfuscation, same as ``Board``
+    if value := cell & CELL_VALUE:
+        return value, BoardSpaceType.VALUE, True, False
+    return 0, BoardSpaceType.BLANK, True, False
+
+
+def _pack_fields(x: int, y: int, value: int | None, type_: BoardSpaceType | None, hit: bool, flagged: bool) -> bytes:
+    """
+    Packs the fields of a space into a single binary record, see ``SPACE_RECORD``
+    """
+    return SPACE_RECORD.pack(
+        x,
+        y,
+        UNKNOWN_VALUE if value is None else value,
+        TYPE_CODES[type_],
+        (FLAG_HIT if hit else 0) | (FLAG_FLAGGED if flagged else 0)
+    )
+
+
+def encode_cells(cells: Iterable[tuple[int, int]], height: int, binary: bool) -> bytes:
+    """
+    Packs the cells of a board in the order they are given, straight from their cell bits like ``encode_cell_rows``.
+
+    Parameters
+    ----------
+    cells : Iterable[tuple[int, int]]
+        Row-major index and cell bits of every cell to pack, see ``Board.reveal``
+
+    height : int
+        Height of the board
+
+    binary : bool
+        Whether to pack the cells into binary records, or JSON
+
+    Returns
+    -------
+    content : bytes
+        Back-to-back binary records (see ``SPACE_RECORD``), or a JSON list of spaces
+    """
+    spaces = [(*divmod(index, height), *_cell_fields(cell)) for index, cell in cells]
+    if binary:
+        return b"".join(_pack_fields(*space) for space in spaces)
+    return orjson.dumps([
+        {"x": x, "y": y, "value": value, "type": type_, "hit": hit, "flagged": flagged}
+        for x, y, value, type_, hit, flagged in spaces
+    ])
+
+
+def encode_cell_rows(rows: Iterable[tuple[int, list[int], list[int]]], binary: bool) -> Generator[bytes, None, None]:
+    """
+    Packs the cells of a board row by row, straight from their cell bits instead of building a ``BoardSpace`` for each.
+    The value and type of a space are only given out if it was hit, same as /hit and /flag. Rows are only taken from
+    ``rows`` as they are packed.
+
+    Parameters
+    ----------
+    rows : Iterable[tuple[int, list[int], list[int]]]
+        The x, the y of every cell and the cell bits of every cell of each row to pack, see ``Board.changed_rows``
+
+    binary : bool
+        Whether to pack the cells into binary records, or JSON
+
+    Returns
+    -------
+    Generator of the packed rows, either back-to-back binary records (see ``SPACE_RECORD``) or a line with a JSON list
+    of spaces
+    """
+    for x, ys, cells in rows:
+        spaces = [(y, *_cell_fields(cell)) for y, cell in zip(ys, cells)]
+        if binary:
+            yield b"".join(_pack_fields(x, *space) for space in spaces)
+        else:
+            yield orjson.dumps([
+                {"x": x, "y": y, "value": value, "type": type_, "hit": hit, "flagged": flagged}
+                for y, value, type_, hit, flagged in spaces
+            ]) + b"\n"
+
+
+def wants_binary(request: Request) -> bool:
+    """
+    Checks if the caller asked for the packed binary format with the ``Accept`` header.
+
+    Parameters
+    ----------
+    request : Request
+        Incoming request
+
+    Returns
+    -------
+    result : bool
+        True if the response should be packed binary records instead of JSON
+    """
+    return SPACES_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def binary_response(content: bytes) -> Response:
+    """
+    Parameters
+    ----------
+    content : bytes
+        Packed records
+
+    Returns
+    -------
+    response : Response
+        Response with the packed binary media type
+    """
+    return Response(content=content, media_type=SPACES_MEDIA_TYPE)
@@ -0,0 +1,98 @@
+import numpy as np
+
+
+class Fenwick2D:
+    """
+    2D Fenwick (binary indexed) tree over a grid of counts. Adding to a cell and summing a rectangle both take
+    O(log(length) * log(height)).
+    """
+
+    def __init__(self, length: int, height: int):
+        """
+        Parameters
+        ----------
+        length : int
+        height : int
+            Dimensions of the grid
+        """
+        self.length = length
+        self.height = height
+        self._tree = [0] * ((length + 1) * (height + 1))
+
+    @classmethod
+    def from_counts(cls, counts: np.ndarray) -> "Fenwick2D":
+        """
+        Builds a tree over a grid of counts in O(length * height), instead of one ``add`` per cell. Every node of a
+        Fenwick tree holds the sum of the ``i & -i`` cells up to and including its own, which is a difference of two
+        prefix sums, so the tree is built with a prefix sum and a difference along each axis in turn.
+
+        Parameters
+        ----------
+        counts : np.ndarray
+            Counts by x, y, with a shape of (length, height)
+
+        Returns
+        -------
+        tree : Fenwick2D
+            Tree over the counts
+        """
+        length, height = counts.shape
+        grid = np.zeros((length + 1, height + 1), dtype=np.int64)
+        grid[1:, 1:] = counts
+
+        i = np.arange(1, length + 1)
+        prefix = grid.cumsum(axis=0)
+        grid[1:] = prefix[i] - prefix[i - (i & -i)]
+
+        j = np.arange(1, height + 1)
+        prefix = grid.cumsum(axis=1)
+        grid[:, 1:] = prefix[:, j] - prefix[:, j - (j & -j)]
+
+        tree = cls(length, height)
+        tree._tree = grid.ravel().tolist()
+        return tree
+
+    def add(self, x: int, y: int, delta: int) -> None:
+        """
+        Adds ``delta`` to the count of a cell.
+        """
+        stride = self.height + 1
+        i = x + 1
+        while i <= self.length:
+            j = y + 1
+            while j <= self.height:
+                self._tree[i * stride + j] += delta
+                j += j & -j
+            i += i & -i
+
+    def _prefix(self, x: int, y: int) -> int:
+        """
+        Returns
+        -------
+        total : int
+            Sum of the counts of every cell before x, y: the rectangle from 0, 0 to x - 1, y - 1
+        """
+        stride = self.height + 1
+        total = 0
+        i = x
+        while i > 0:
+            j = y
+            while j > 0:
+                total += self._tree[i * stride + j]
+                j -= j & -j
+            i -= i & -i
+        return total
+
+    def sum(self, x0: int, y0: int, x1: int, y1: int) -> int:
+        """
+        Returns
+        -------
+        total : int
+            Sum of the counts of every cell in the rectangle from x0, y0 to x1, y1, inclusive
+        """
+        return (
+            self._prefix(x1 + 1, y1 + 1)
+            - self._prefix(x0, y1 + 1)
+            - self._prefix(x1 + 1, y0)
+            + self._prefix(x0, y0)
+        )
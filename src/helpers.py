@@ -1,87 +1,250 @@
-from asyncio import sleep
-from random import randint
-from typing import Coroutine, Any
-from uuid import UUID
+from time import perf_counter
+from typing import Coroutine, Any, Generator
 
 from fastapi import HTTPException
 
-from models import Board, BoardSpace
+from latency import LatencyScheduler
+from metrics import record_injected_latency
+from models import Board, BoardSpace, Region, RegionStats
 from settings import LatencyValue
 
 MILLISECONDS = 0.001
 
+SCHEDULER = LatencyScheduler(resolution=MILLISECONDS)  # Configured by the app settings at startup
 
-async def wait_for(latency: LatencyValue) -> Coroutine[Any, Any, Any]:
+
+async def wait_for(latency: LatencyValue, scale: float = 1) -> Coroutine[Any, Any, Any]:
     """
-    Sleeps thread for a certain amount of milliseconds or a randomly selected amount of milliseconds from a range.
+    Sleeps for a certain amount of milliseconds or a randomly selected amount of milliseconds from a range, on the
+    ``SCHEDULER`` timing wheel.
 
     Parameters
     ----------
     latency : LatencyValue
         Either a range of 2 ints or a single int value of the # milliseconds to sleep for
 
+    scale : float
+        Multiplier for the sleep time, for endpoints where the latency grows with the amount of work
+
     Returns
     -------
     Coroutine
     """
     match latency:
         case int(min_), int(max_) if min_ < max_ and max_ > 0:
-            sleep_time = randint(min_, max_)
-        case int(value) if value > 0:
+            sleep_time = SCHEDULER.jitter(min_, max_)
+        case int(value) if value >= 0:
             sleep_time = value
         case _:
             raise ValueError(f"Invalid latency value: {latency}")
-    return await sleep(sleep_time * MILLISECONDS)
+    start = perf_counter()
+    result = await SCHEDULER.sleep(sleep_time * scale * MILLISECONDS)
+    record_injected_latency(perf_counter() - start)
+    return result
 
 
-def get_board_by_id_or_error(board_id: UUID, boards: list[Board]) -> Board:
+def get_space_on_board_or_error(space: BoardSpace, board: Board) -> BoardSpace:
     """
-    Retrieves a board by ID from a list or will throw an HTTP exception if it doesn't exist.
+    Retrieves a space on a board by coordinates.
 
     Parameters
     ----------
-    board_id : UUID
-        ID of the board to retrieve from the list
+    space : BoardSpace
+        Coordinates of the space to get.
 
-    boards : list[Board]
-        Board list to query
+    board : Board
+        Minesweeper board to check
 
     Returns
     -------
-    board : Board
-        Board from the list if it exists
+    space : BoardSpace
+        space if it exists on the board, or else will raise a `HTTPException`
     """
-    if board := next((b for b in boards if b.id == board_id), None):
-        return board
+    try:
+        space = board[space]
+    except IndexError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    return space
 
-    raise HTTPException(
-        status_code=400,
-        detail="Board not found!"
-    )
 
+def count_mines_in_region(region: Region, board: Board) -> int:
+    """
+    Counts the mines in a rectangle of a board.
 
-def get_space_on_board_or_error(space: BoardSpace, board: Board) -> BoardSpace:
+    Parameters
+    ----------
+    region : Region
+        Rectangle to count the mines in
+
+    board : Board
+        Minesweeper board that the rectangle is on
+
+    Returns
+    -------
+    mines : int
+        Number of mines in the rectangle, or will raise a `HTTPException` if the rectangle isn't fully on the board
     """
-    Retrieves a space on a board by coordinates.
+    try:
+        return board.mines_in_region(region)
+    except IndexError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+
+
+def get_region_stats_or_error(region: Region, board: Board) -> RegionStats:
+    """
+    Counts the mines, value total and hit/flagged spaces in a rectangle of a board.
 
     Parameters
     ----------
-    space : BoardSpace
-        Coordinates of the space to get.
+    region : Region
+        Rectangle to count in
 
     board : Board
-        Minesweeper board to check
+        Minesweeper board that the rectangle is on
 
     Returns
     -------
-    space : BoardSpace
-        space if it exists on the board, or else will raise a `HTTPException`
+    stats : RegionStats
+        Counts for the rectangle, or will raise a `HTTPException` if the rectangle isn't fully on the board
     """
     try:
-        space = board[space]
+        return board.region_stats(region)
     except IndexError as e:
         raise HTTPException(
             status_code=400,
             detail=str(e)
         )
-    return space
+
+
+def get_changed_rows_or_error(board: Board, since: int) -> Generator[tuple[int, list[int], list[int]], None, None]:
+    """
+    Gets the cells of a board that changed after a version of the board, row by row, see ``Board.changed_rows``.
+
+    Parameters
+    ----------
+    board : Board
+        Minesweeper board to get the cells of
+
+    since : int
+        Version of the board to get the changes after, 0 gets every cell that is hit/flagged
+
+    Returns
+    -------
+    Generator of the x, the y of every changed cell and the cell bits of every changed cell for each row, or will raise
+    a `HTTPException` if the version is ahead of the board or from before its changes are known
+    """
+    if since > board.version:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Version {since} is ahead of the board, which is at version {board.version}"
+        )
+
+    board.track_changes()
+    if 0 < since < board.tracked_since:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Changes before version {board.tracked_since} are not known, get the full state with since=0"
+        )
+    return board.changed_rows(since)
+
+
+def hit_space(space: BoardSpace, board: Board) -> BoardSpace:
+    """
+    Hits a space on a board by coordinates.
+
+    Parameters
+    ----------
+    space : BoardSpace
+        Coordinates of the space to hit
+
+    board : Board
+        Minesweeper board that the space is on
+
+    Returns
+    -------
+    space : BoardSpace
+        Space that was hit, or will raise a `HTTPException` if the space can't be hit
+    """
+    space = get_space_on_board_or_error(space, board)
+
+    if space.hit:
+        raise HTTPException(
+            status_code=400,
+            detail="Space already hit!"
+        )
+    return board.hit(space)
+
+
+def reveal_space(space: BoardSpace, board: Board, limit: int) -> tuple[list[tuple[int, int]], bool]:
+    """
+    Hits a space on a board by coordinates, flood filling outward if it is blank. See ``Board.reveal``.
+
+    Parameters
+    ----------
+    space : BoardSpace
+        Coordinates of the space to start from
+
+    board : Board
+        Minesweeper board that the space is on
+
+    limit : int
+        Most spaces to hit
+
+    Returns
+    -------
+    cells, truncated : tuple[list[tuple[int, int]], bool]
+        Index and cell bits of the spaces that were hit and whether there were more to hit, or will raise a
+        `HTTPException` if the first space can't be hit
+    """
+    space = get_space_on_board_or_error(space, board)
+
+    if space.hit:
+        raise HTTPException(
+            status_code=400,
+            detail="Space already hit!"
+        )
+    return board.reveal(space, limit)
+
+
+def flag_space(space: BoardSpace, board: Board) -> BoardSpace:
+    """
+    Toggles a flag on a space on a board by coordinates.
+
+    Parameters
+    ----------
+    space : BoardSpace
+        Coordinates of the space to flag
+
+    board : Board
+        Minesweeper board that the space is on
+
+    Returns
+    -------
+    space : BoardSpace
+        Coordinates and flag status of space, or will raise a `HTTPException` if the space can't be flagged
+    """
+    space = get_space_on_board_or_error(space, board)
+
+    if space.hit:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot flag space, it has already been hit!"
+        )
+    if not space.flagged and board.flags >= board.settings.mines:
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot place another flag! Flags are limited to the # of mines on a board"
+        )
+    space = board.toggle_flag(space)
+
+    return BoardSpace(
+        x=space.x,
+        y=space.y,
+        flagged=space.flagged
+    )
@@ -0,0 +1,82 @@
+import asyncio
+import math
+import random
+
+
+class LatencyScheduler:
+    """
+    Timing wheel for the simulated latency of ``helpers.wait_for``. Deadlines are rounded up into buckets of
+    ``resolution`` seconds, and every waiter in a bucket is woken by a single timer, instead of every sleep putting its
+    own timer on the event loop. Jitter comes from its own random source, so it can be seeded to be reproducible.
+    """
+
+    def __init__(self, resolution: float = 0.001, seed: int | None = None, enabled: bool = True):
+        """
+        Parameters
+        ----------
+        resolution : float
+            Seconds covered by each bucket
+
+        seed : int | None
+            Seed for the jitter, random if not provided
+
+        enabled : bool
+            Whether to sleep at all, turning it off makes every sleep return right away
+        """
+        self.resolution = resolution
+        self.enabled = enabled
+        self.random = random.Random(seed)
+
+        self._buckets: dict[int, list[asyncio.Future]] = {}  # Waiters by tick of their deadline
+
+    def configure(self, seed: int | None = None, enabled: bool = True) -> None:
+        """
+        Parameters
+        ----------
+        seed : int | None
+            Seed for the jitter, random if not provided
+
+        enabled : bool
+            Whether to sleep at all
+        """
+        self.random.seed(seed)
+        self.enabled = enabled
+
+    def jitter(self, min_: int, max_: int) -> int:
+        """
+        Returns
+        -------
+        value : int
+            Random value between ``min_`` and ``max_``, inclusive
+        """
+        return self.random.randint(min_, max_)
+
+    async def sleep(self, seconds: float) -> None:
+        """
+        Waits until the end of the bucket that is ``seconds`` from now.
+
+        Parameters
+        ----------
+        seconds : float
+            Seconds to wait
+        """
+        if not self.enabled or seconds <= 0:
+            return
+
+        loop = asyncio.get_running_loop()
+        tick = math.ceil((loop.time() + seconds) / self.resolution)
+        if (bucket := self._buckets.get(tick)) is None:
+            bucket = self._buckets[tick] = []
+            loop.call_at(tick * self.resolution, self._wake, tick)
+
+        future = loop.create_future()
+        bucket.append(future)
+        await future
+
+    def _wake(self, tick: int) -> None:
+        """
+        Wakes every waiter of a bucket
+        """
+        for future in self._buckets.pop(tick):
+            if not future.done():
+                future.set_result(None)
@@ -1,59 +1,289 @@
+import asyncio
+import math
 from uuid import UUID
 
-from fastapi import FastAPI, HTTPException
+import orjson
 
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, WebSocket
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
+
+import encoding
 import helpers
 import models
+from dispatcher import Dispatcher
+from metrics import Metrics, MetricsMiddleware
+from offload import Offloader
+from pool import BoardPool
+from sessions import Session
 from settings import Settings
+from state import new_state
+from tracing import Tracer, TraceMiddleware, record_new_boards
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 settings = Settings()
 
-SCORE = 0
-OUTSTANDING_BOARDS: list[models.Board] = []  # Boards that have been requested but not returned
+STATE = new_state(settings.app)
+helpers.SCHEDULER.configure(seed=settings.app.latency_seed, enabled=settings.app.latency_enabled)
+OFFLOADER = Offloader(
+    kind=settings.app.offload_executor,
+    workers=settings.app.offload_workers,
+    min_area=settings.app.offload_min_area
+)
+BOARD_POOL = BoardPool(
+    settings=settings.board,
+    size=settings.app.board_pool_size,
+    workers=settings.app.board_pool_workers,
+    offloader=OFFLOADER
+)
+DISPATCHER = Dispatcher(STATE, latency=settings.latency, window=settings.app.coalesce_window)
+BACKGROUND_TASKS: set[asyncio.Task] = set()
+METRICS = Metrics(
+    outstanding_boards=STATE.outstanding_boards,
+    sessions=STATE.session_count,
+    max_boards=settings.app.max_boards
+)
+TRACER = Tracer(settings.app.trace_path) if settings.app.trace_path else None
+
+if settings.app.metrics:
+    app.add_middleware(MetricsMiddleware, metrics=METRICS)
+if TRACER:
+    app.add_middleware(TraceMiddleware, tracer=TRACER)
+
+
+def check_capacity(session: Session) -> None:
+    """
+    Will raise a `HTTPException` if there is no space available for another outstanding board in a session
+
+    Parameters
+    ----------
+    session : Session
+        Session to check
+    """
+    if session.boards.is_full:
+        METRICS.capacity_rejections += 1
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot provide another board until one is checked in!"
+        )
+
+
+def give_out_board(session: Session, board: models.Board) -> models.Board:
+    """
+    Adds a new board to the outstanding boards of a session, if there is space available for another one.
+
+    Parameters
+    ----------
+    session : Session
+        Session to give the board to
+
+    board : models.Board
+        New board to give out
+
+    Returns
+    -------
+    board : models.Board
+        Board that was given out
+    """
+    check_capacity(session)
+    session.boards.add(board)
+    METRICS.boards_created += 1
+    return board
+
+
+async def give_out_boards(session_key: str | None, count: int) -> tuple[list[models.Board], float]:
+    """
+    Gives out up to ``count`` new boards, limited by the space available for outstanding boards. Boards that have to be
+    generated by the offloader are generated outside the session, then given out if there is still space for them.
+
+    Parameters
+    ----------
+    session_key : str | None
+        Session key, or None for the default session
+
+    count : int
+        Number of boards to give out
+
+    Returns
+    -------
+    boards, score : tuple[list[models.Board], float]
+        Boards that were given out, at least 1, and the current score
+    """
+    with STATE.session(session_key) as session:
+        check_capacity(session)
+        count = min(count, session.boards.available)
+        if not BOARD_POOL.offloads:
+            boards = [give_out_board(session, BOARD_POOL.get()) for _ in range(count)]
+            record_new_boards(board.id for board in boards)
+            return boards, session.score
+
+    boards = await asyncio.gather(*(BOARD_POOL.take() for _ in range(count)))
+    with STATE.session(session_key) as session:
+        # Other requests may have taken some of the space while the boards were generated
+        boards = [give_out_board(session, board) for board in boards[:max(session.boards.available, 1)]]
+        record_new_boards(board.id for board in boards)
+        return boards, session.score
+
+
+def check_in_board(session: Session, board_id: UUID) -> models.Board:
+    """
+    Assigns points for a board and frees up its space in the outstanding boards of a session
+
+    Parameters
+    ----------
+    session : Session
+        Session that the board was given to
+
+    board_id : UUID
+        ID of the board to check
+
+    Returns
+    -------
+    board : models.Board
+        Board that was checked
+    """
+    board = session.boards.remove(board_id)
+    session.score += board.score
+    METRICS.boards_checked += 1
+    return board
+
+
+async def save_state() -> None:
+    """
+    Saves the state every ``snapshot_interval`` seconds, so it can be restored after a restart
+    """
+    while True:
+        await asyncio.sleep(settings.app.snapshot_interval)
+        await STATE.save()
+
+
+@app.on_event("startup")
+async def _():
+    if TRACER:
+        TRACER.start(settings.dict())
+    await OFFLOADER.start()
+    await BOARD_POOL.start()
+    STATE.start()
+    if settings.app.snapshot_path:
+        BACKGROUND_TASKS.add(asyncio.create_task(save_state()))
+
+
+@app.on_event("shutdown")
+async def _():
+    for task in BACKGROUND_TASKS:
+        task.cancel()
+    await asyncio.gather(*BACKGROUND_TASKS, return_exceptions=True)
+    BACKGROUND_TASKS.clear()
+    await DISPATCHER.stop()
+
+    await BOARD_POOL.stop()
+    await OFFLOADER.stop()
+    STATE.close()
+    if TRACER:
+        TRACER.close()
 
 
 @app.get("/score")
-async def _() -> models.Score:
+async def _(x_session: str | None = Header(default=None)) -> models.Score:
     """
     Returns the current score.
 
+    Parameters
+    ----------
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
     Returns
     -------
     score : models.Score
         Current score like: {"score": <score_int>}
     """
-    return models.Score(SCORE)
+    with STATE.session(x_session, write=False) as session:
+        return models.Score(session.score)
+
+
+@app.get("/pool")
+async def _() -> models.PoolStats:
+    """
+    Returns the usage counters of the board pool, useful for sizing the pool against the rate of /board requests.
+
+    Returns
+    -------
+    stats : models.PoolStats
+        Pool size, number of boards ready, and the number of hits/misses
+    """
+    return BOARD_POOL.stats
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def _() -> str:
+    """
+    Returns the request time histograms, split into injected latency and compute time by endpoint, and the board
+    counters.
+
+    Returns
+    -------
+    metrics : str
+        Metrics in Prometheus text format
+    """
+    return METRICS.render()
 
 
 @app.post("/board")
-async def _() -> models.Board:
+async def _(x_session: str | None = Header(default=None)) -> models.Board:
     """
     Generates a new board if there is space available for another outstanding board. Will return the ID of the created
     board.
 
+    Parameters
+    ----------
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
     Returns
     -------
     board : dict[str, UUID]
         Response format like: {"id": "<new_board_uuid>"}
     """
-    global OUTSTANDING_BOARDS
-
-    if len(OUTSTANDING_BOARDS) > settings.app.max_boards:
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot provide another board until one is checked in!"
-        )
-
-    board = models.Board.new(settings=settings.board)
-    OUTSTANDING_BOARDS.append(board)
+    (board,), _ = await give_out_boards(x_session, 1)
 
     await helpers.wait_for(settings.latency.board)
     return models.Board(id=board.id, settings=board.settings)
 
 
+@app.post("/boards")
+async def _(count: int = Query(ge=1), x_session: str | None = Header(default=None)) -> models.NewBoards:
+    """
+    Generates up to ``count`` new boards, limited by the space available for outstanding boards. Latency grows with
+    the square root of the number of boards created.
+
+    Parameters
+    ----------
+    count : int
+        Number of boards to create
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
+    Returns
+    -------
+    new_boards : models.NewBoards
+        The created boards and the current score
+    """
+    boards, score = await give_out_boards(x_session, count)
+    boards = [models.Board(id=board.id, settings=board.settings) for board in boards]
+
+    await helpers.wait_for(settings.latency.boards, scale=math.sqrt(len(boards)))
+    return models.NewBoards(boards=boards, score=score)
+
+
 @app.post("/hit")
-async def _(board_id: UUID, space: models.BoardSpace) -> models.BoardSpace:
+async def _(
+    board_id: UUID,
+    space: models.BoardSpace,
+    request: Request,
+    x_session: str | None = Header(default=None)
+) -> models.BoardSpace:
     """
     Hits a space on a board by ID and space coordinates. Will return the actual space.
 
@@ -65,28 +295,83 @@ async def _(board_id: UUID, space: models.BoardSpace) -> models.BoardSpace:
     space : models.BoardSpace
         Coordinates of space to hit
 
+    request : Request
+        Incoming request, will respond with packed binary records if asked for with the ``Accept`` header
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
     Returns
     -------
     revealed_space : models.BoardSpace
         Space that was hit
     """
-    board = helpers.get_board_by_id_or_error(board_id, OUTSTANDING_BOARDS)
-    space = helpers.get_space_on_board_or_error(space, board)
+    if settings.app.coalesce_window:
+        action = models.Action(type=models.ActionType.HIT, x=space.x, y=space.y)
+        space = await DISPATCHER.submit(x_session, board_id, action)
+    else:
+        with STATE.session(x_session) as session:
+            space = helpers.hit_space(space, session.boards.get(board_id))
+        await helpers.wait_for(settings.latency.hit)
+
+    if encoding.wants_binary(request):
+        return encoding.binary_response(encoding.encode_space(space))
+    return space
 
-    if space.hit:
-        raise HTTPException(
-            status_code=400,
-            detail="Space already hit!"
-        )
-    space.hit = True
-    space.flagged = False
 
-    await helpers.wait_for(settings.latency.hit)
-    return space
+@app.post("/reveal")
+async def _(
+    board_id: UUID,
+    space: models.BoardSpace,
+    request: Request,
+    x_session: str | None = Header(default=None)
+) -> list[models.BoardSpace]:
+    """
+    Hits a space on a board, and if it is blank, also hits the connected blank spaces and the value spaces around them,
+    like clicking a blank space in Windows Minesweeper. Latency grows with the number of spaces revealed. At most
+    ``max_reveal`` spaces are hit, if there were more to hit the ``X-Reveal-Truncated`` header is ``true``, and the
+    rest can be revealed from the spaces that are still not hit around the blank spaces that were.
+
+    Parameters
+    ----------
+    board_id : UUID
+        ID of the board to hit the space on
+
+    space : models.BoardSpace
+        Coordinates of space to start from
+
+    request : Request
+        Incoming request, will respond with packed binary records if asked for with the ``Accept`` header
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
+    Returns
+    -------
+    revealed_spaces : list[models.BoardSpace]
+        Every space that was hit, starting with the given space
+    """
+    with STATE.session(x_session) as session:
+        board = session.boards.get(board_id)
+        cells, truncated = helpers.reveal_space(space, board, settings.app.max_reveal)
+        height = board.settings.height
+
+    await helpers.wait_for(settings.latency.reveal, scale=len(cells))
+    binary = encoding.wants_binary(request)
+    return Response(
+        content=encoding.encode_cells(cells, height, binary),
+        media_type=encoding.SPACES_MEDIA_TYPE if binary else "application/json",
+        headers={"X-Reveal-Truncated": "true" if truncated else "false"}
+    )
 
 
 @app.post("/batch_hit")
-async def _(board_id: UUID, spaces: list[models.BoardSpace]) -> list[models.BoardSpace]:
+async def _(
+    board_id: UUID,
+    spaces: list[models.BoardSpace],
+    request: Request,
+    x_session: str | None = Header(default=None)
+) -> list[models.BoardSpace]:
     """
     Hit spaces on the board. The spaces must all be neighbors. For this endpoint, if any of the spaces are mines, it
     will return a 400 error and the spaces will not be hit
@@ -99,39 +384,52 @@ async def _(board_id: UUID, spaces: list[models.BoardSpace]) -> list[models.Boar
     spaces : list[models.BoardSpace]
         Coordinates of spaces to hit
 
+    request : Request
+        Incoming request, will respond with packed binary records if asked for with the ``Accept`` header
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
     Returns
     -------
     revealed_spaces : list[models.BoardSpace]
         Spaces that were hit
     """
-    board = helpers.get_board_by_id_or_error(board_id, OUTSTANDING_BOARDS)
-    spaces = [helpers.get_space_on_board_or_error(space, board) for space in spaces]
-    if len(spaces) < 2:
-        raise HTTPException(
-            status_code=400,
-            detail="Batch hits must include at least 2 spaces"
-        )
+    with STATE.session(x_session) as session:
+        board = session.boards.get(board_id)
+        spaces = [helpers.get_space_on_board_or_error(space, board) for space in spaces]
+        if len(spaces) < 2:
+            raise HTTPException(
+                status_code=400,
+                detail="Batch hits must include at least 2 spaces"
+            )
 
-    if any(space for space in spaces if space.type == models.BoardSpaceType.MINE):
-        raise HTTPException(
-            status_code=400,
-            detail="Batch hits cannot include mines!"
-        )
-    for space in spaces:
-        if space.hit:
+        if any(space for space in spaces if space.type == models.BoardSpaceType.MINE):
             raise HTTPException(
                 status_code=400,
-                detail="A space in the batch was already hit!"
+                detail="Batch hits cannot include mines!"
             )
-        space.hit = True
-        space.flagged = False
+        for i, space in enumerate(spaces):
+            if board[space].hit:
+                raise HTTPException(
+                    status_code=400,
+                    detail="A space in the batch was already hit!"
+                )
+            spaces[i] = board.hit(space)
 
     await helpers.wait_for(settings.latency.batch_hit)
+    if encoding.wants_binary(request):
+        return encoding.binary_response(encoding.encode_spaces(spaces))
     return spaces
 
 
 @app.post("/flag")
-async def _(board_id: UUID, space: models.BoardSpace) -> models.BoardSpace:
+async def _(
+    board_id: UUID,
+    space: models.BoardSpace,
+    request: Request,
+    x_session: str | None = Header(default=None)
+) -> models.BoardSpace:
     """
     Toggles a flag on a space on a board by ID and space coordinates.
 
@@ -143,76 +441,453 @@ async def _(board_id: UUID, space: models.BoardSpace) -> models.BoardSpace:
     space : models.BoardSpace
         Coordinates of the space to flag
 
+    request : Request
+        Incoming request, will respond with packed binary records if asked for with the ``Accept`` header
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
     Returns
     -------
     space : models.BoardSpace
         Coordinates and flag status of space
     """
-    board = helpers.get_board_by_id_or_error(board_id, OUTSTANDING_BOARDS)
-    space = helpers.get_space_on_board_or_error(space, board)
+    if settings.app.coalesce_window:
+        action = models.Action(type=models.ActionType.FLAG, x=space.x, y=space.y)
+        space = await DISPATCHER.submit(x_session, board_id, action)
+    else:
+        with STATE.session(x_session) as session:
+            space = helpers.flag_space(space, session.boards.get(board_id))
+        await helpers.wait_for(settings.latency.flag)
+
+    if encoding.wants_binary(request):
+        return encoding.binary_response(encoding.encode_space(space))
+    return space
 
-    if space.hit:
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot flag space, it has already been hit!"
-        )
-    if len([space for space in board if space.flagged]) >= board.settings.mines:
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot place another flag! Flags are limited to the # of mines on a board"
-        )
-    space.flagged = not space.flagged
 
-    await helpers.wait_for(settings.latency.flag)
-    return models.BoardSpace(
-        x=space.x,
-        y=space.y,
-        flagged=space.flagged
-    )
+@app.post("/actions")
+async def _(
+    board_id: UUID,
+    actions: list[models.Action],
+    request: Request,
+    x_session: str | None = Header(default=None)
+) -> list[models.ActionResult]:
+    """
+    Applies a list of hits and flags to a board in order. Unlike `/batch_hit`, an action that fails does not stop the
+    rest of the actions, the error is returned in its result instead. Latency grows with the square root of the number
+    of actions.
+
+    Parameters
+    ----------
+    board_id : UUID
+        ID of the board to apply the actions on
+
+    actions : list[models.Action]
+        Hits/flags to apply, in order
+
+    request : Request
+        Incoming request, will respond with packed binary records if asked for with the ``Accept`` header
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
+    Returns
+    -------
+    results : list[models.ActionResult]
+        Result for each action, in the same order as the actions
+    """
+    with STATE.session(x_session) as session:
+        board = session.boards.get(board_id)
+        if not actions:
+            raise HTTPException(
+                status_code=400,
+                detail="Must include at least 1 action"
+            )
+
+        results = []
+        targets = [models.BoardSpace(x=action.x, y=action.y) for action in actions]
+        for action, space in zip(actions, targets):
+            try:
+                match action.type:
+                    case models.ActionType.HIT:
+                        space = helpers.hit_space(space, board)
+                    case models.ActionType.FLAG:
+                        space = helpers.flag_space(space, board)
+            except HTTPException as e:
+                results.append(models.ActionResult(error=e.detail))
+                continue
+            results.append(models.ActionResult(space=space))
+
+    await helpers.wait_for(settings.latency.actions, scale=math.sqrt(len(actions)))
+    if encoding.wants_binary(request):
+        return encoding.binary_response(encoding.encode_action_results(targets, results))
+    return results
 
 
 @app.post("/check")
-async def _(board_id: UUID) -> models.Score:
+async def _(board_id: UUID, x_session: str | None = Header(default=None)) -> models.Score:
     """
-    Checks a board for correctness, assigns points, and frees up the space in `OUTSTANDING_BOARDS`
+    Checks a board for correctness, assigns points, and frees up the space in the outstanding boards of the session
 
     Parameters
     ----------
     board_id : UUID
         ID of the board to check
 
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
     Returns
     -------
     score : models.Score
         Current score after checking
     """
-    global SCORE
-    global OUTSTANDING_BOARDS
+    with STATE.session(x_session) as session:
+        check_in_board(session, board_id)
+        score = session.score
+
+    await helpers.wait_for(settings.latency.check)
+    return models.Score(score)
+
+
+@app.post("/check_many")
+async def _(board_ids: list[UUID], x_session: str | None = Header(default=None)) -> models.CheckResults:
+    """
+    Checks several boards at once. If any of the boards are not outstanding, none of the boards will be checked.
+    Latency grows with the square root of the number of boards checked.
+
+    Parameters
+    ----------
+    board_ids : list[UUID]
+        IDs of the boards to check
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
+    Returns
+    -------
+    results : models.CheckResults
+        Points each board was worth and the current score after checking
+    """
+    board_ids = list(dict.fromkeys(board_ids))
+    if not board_ids:
+        raise HTTPException(
+            status_code=400,
+            detail="Must include at least 1 board"
+        )
 
-    board_score = 0
-    board = helpers.get_board_by_id_or_error(board_id, OUTSTANDING_BOARDS)
+    with STATE.session(x_session) as session:
+        for board_id in board_ids:
+            session.boards.get(board_id)
 
-    # Flat Processing bonus equal to length and height of the board
-    board_score += board.settings.length + board.settings.height
+        results = []
+        for board_id in board_ids:
+            board = check_in_board(session, board_id)
+            results.append(models.BoardScore(board_id=board.id, score=board.score))
+        score = session.score
 
-    # Add up all safe, value spaces that were hit
-    board_score += sum(
-        space.value
-        for space in board
-        if space.type == models.BoardSpaceType.VALUE and space.hit
+    await helpers.wait_for(settings.latency.check_many, scale=math.sqrt(len(board_ids)))
+    return models.CheckResults(boards=results, score=score)
+
+
+@app.get("/is_space_blank")
+async def _(
+    board_id: UUID,
+    space: models.BoardSpace,
+    x_session: str | None = Header(default=None)
+) -> models.Answer:
+    """
+    Answers whether a space is blank, meaning it is not a mine and has no mines around it.
+
+    Parameters
+    ----------
+    board_id : UUID
+        ID of the board the space is on
+
+    space : models.BoardSpace
+        Coordinates of the space to ask about
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
+    Returns
+    -------
+    answer : models.Answer
+        Answer like: {"answer": <bool>}
+    """
+    with STATE.session(x_session, write=False) as session:
+        space = helpers.get_space_on_board_or_error(space, session.boards.get(board_id))
+
+    await helpers.wait_for(settings.latency.is_space_blank)
+    return models.Answer(space.type == models.BoardSpaceType.BLANK)
+
+
+@app.get("/is_space_a_mine")
+async def _(
+    board_id: UUID,
+    space: models.BoardSpace,
+    x_session: str | None = Header(default=None)
+) -> models.Answer:
+    """
+    Answers whether a space is a mine.
+
+    Parameters
+    ----------
+    board_id : UUID
+        ID of the board the space is on
+
+    space : models.BoardSpace
+        Coordinates of the space to ask about
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
+    Returns
+    -------
+    answer : models.Answer
+        Answer like: {"answer": <bool>}
+    """
+    with STATE.session(x_session, write=False) as session:
+        space = helpers.get_space_on_board_or_error(space, session.boards.get(board_id))
+
+    await helpers.wait_for(settings.latency.is_space_a_mine)
+    return models.Answer(space.type == models.BoardSpaceType.MINE)
+
+
+@app.get("/mines_in_region")
+async def _(
+    board_id: UUID,
+    region: models.Region,
+    x_session: str | None = Header(default=None)
+) -> models.Answer:
+    """
+    Answers how many mines are in a rectangle of the board.
+
+    Parameters
+    ----------
+    board_id : UUID
+        ID of the board to ask about
+
+    region : models.Region
+        Rectangle to count the mines in, must be fully on the board
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
+    Returns
+    -------
+    answer : models.Answer
+        Answer like: {"answer": <int>}
+    """
+    with STATE.session(x_session, write=False) as session:
+        mines = helpers.count_mines_in_region(region, session.boards.get(board_id))
+
+    await helpers.wait_for(settings.latency.mines_in_region)
+    return models.Answer(mines)
+
+
+@app.get("/region")
+async def _(
+    board_id: UUID,
+    region: models.Region,
+    x_session: str | None = Header(default=None)
+) -> models.RegionStats:
+    """
+    Counts the mines, the sum of the values of the safe spaces, and the hit/flagged spaces in a rectangle of the board.
+
+    Parameters
+    ----------
+    board_id : UUID
+        ID of the board to ask about
+
+    region : models.Region
+        Rectangle to count in, must be fully on the board
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
+    Returns
+    -------
+    stats : models.RegionStats
+        Counts like: {"mines": <int>, "value": <int>, "hits": <int>, "flags": <int>}
+    """
+    with STATE.session(x_session, write=False) as session:
+        stats = helpers.get_region_stats_or_error(region, session.boards.get(board_id))
+
+    await helpers.wait_for(settings.latency.region)
+    return stats
+
+
+@app.get("/count_unhit_safe")
+async def _(board_id: UUID, x_session: str | None = Header(default=None)) -> models.Answer:
+    """
+    Answers how many safe spaces on the board have not been hit yet.
+
+    Parameters
+    ----------
+    board_id : UUID
+        ID of the board to ask about
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
+    Returns
+    -------
+    answer : models.Answer
+        Answer like: {"answer": <int>}
+    """
+    with STATE.session(x_session, write=False) as session:
+        count = session.boards.get(board_id).unhit_safe_spaces
+
+    await helpers.wait_for(settings.latency.count_unhit_safe)
+    return models.Answer(count)
+
+
+@app.get("/board/{board_id}/state", response_class=StreamingResponse)
+async def _(
+    board_id: UUID,
+    request: Request,
+    since: int = Query(default=0, ge=0),
+    x_session: str | None = Header(default=None)
+) -> StreamingResponse:
+    """
+    Streams the hit and flagged spaces of a board row by row, as a line with a JSON list of spaces for every row. The
+    version of the board is sent back in the ``X-Board-Version`` header, passing it as ``since`` on the next call will
+    only stream the spaces that changed after it, including spaces that were unflagged with ``flagged`` false. The
+    memory backend only knows the changes from the first call on a board (or from when it was restored), older
+    versions get a 400 error.
+
+    Parameters
+    ----------
+    board_id : UUID
+        ID of the board to get the state of
+
+    request : Request
+        Incoming request, will respond with packed binary records if asked for with the ``Accept`` header
+
+    since : int
+        Version of the board to get the changes after, 0 gets every hit/flagged space
+
+    x_session : str | None
+        Session key from the ``X-Session`` header, the default session is used if not provided
+
+    Returns
+    -------
+    response : StreamingResponse
+        Spaces of each row that has hit/flagged spaces, in order of x then y
+    """
+    with STATE.session(x_session, write=False) as session:
+        board = session.boards.get(board_id, changes=True)
+        rows = helpers.get_changed_rows_or_error(board, since)
+        version = board.version
+
+    await helpers.wait_for(settings.latency.state)
+    binary = encoding.wants_binary(request)
+    return StreamingResponse(
+        encoding.encode_cell_rows(rows, binary),
+        media_type=encoding.SPACES_MEDIA_TYPE if binary else encoding.ROWS_MEDIA_TYPE,
+        headers={"X-Board-Version": str(version)}
     )
 
-    # Penalty for accuracy
-    number_of_mines_flagged = len([
-        space
-        for space in board
-        if space.type == models.BoardSpaceType.MINE and space.flagged
-    ])
-    accuracy = number_of_mines_flagged / board.settings.mines
-    board_score *= accuracy
 
-    SCORE += board_score
-    OUTSTANDING_BOARDS.remove(board)
+async def handle_message(data: str, session_key: str | None) -> models.MessageResult:
+    """
+    Handles a single message from /ws the same way as the matching endpoint, including its latency.
 
-    await helpers.wait_for(settings.latency.check)
-    return models.Score(SCORE)
+    Parameters
+    ----------
+    data : str
+        Raw JSON message, see ``models.Message``
+
+    session_key : str | None
+        Session key that the connection was opened with
+
+    Returns
+    -------
+    result : models.MessageResult
+        Result of the message, tagged with the ID of the message
+    """
+    try:
+        message = models.Message.parse_raw(data)
+    except ValidationError as e:
+        return models.MessageResult(id=None, error=str(e))
+
+    try:
+        if settings.app.coalesce_window and message.type in (models.MessageType.HIT, models.MessageType.FLAG):
+            action = models.Action(type=models.ActionType(message.type), x=message.x, y=message.y)
+            result = await DISPATCHER.submit(session_key, message.board_id, action)
+            return models.MessageResult(id=message.id, result=result.dict())
+
+        if message.type == models.MessageType.BOARD:
+            (board,), _ = await give_out_boards(session_key, 1)
+            await helpers.wait_for(settings.latency.board)
+            return models.MessageResult(id=message.id, result=models.Board(id=board.id, settings=board.settings).dict())
+
+        with STATE.session(session_key) as session:
+            match message.type:
+                case models.MessageType.HIT:
+                    board = session.boards.get(message.board_id)
+                    result = helpers.hit_space(models.BoardSpace(x=message.x, y=message.y), board)
+                    latency = settings.latency.hit
+                case models.MessageType.FLAG:
+                    board = session.boards.get(message.board_id)
+                    result = helpers.flag_space(models.BoardSpace(x=message.x, y=message.y), board)
+                    latency = settings.latency.flag
+                case models.MessageType.CHECK:
+                    check_in_board(session, message.board_id)
+                    result = models.Score(session.score)
+                    latency = settings.latency.check
+        await helpers.wait_for(latency)
+    except HTTPException as e:
+        return models.MessageResult(id=message.id, error=e.detail)
+    except ValidationError as e:
+        return models.MessageResult(id=message.id, error=str(e))
+
+    return models.MessageResult(id=message.id, result=result.dict())
+
+
+@app.websocket("/ws")
+async def _(websocket: WebSocket):
+    """
+    Session that accepts a stream of ``models.Message`` requests and sends back a ``models.MessageResult`` for each of
+    them. Messages are handled concurrently, so results are sent back as soon as they are ready, which may not be the
+    order the messages were sent in. Messages use the session of the ``X-Session`` header the connection was opened
+    with.
+
+    Parameters
+    ----------
+    websocket : WebSocket
+        Connection to the caller
+    """
+    await websocket.accept()
+    send_lock = asyncio.Lock()
+    in_flight = asyncio.Semaphore(settings.app.ws_max_in_flight)
+    pending: set[asyncio.Task] = set()
+
+    async def respond(data: str):
+        try:
+            result = await handle_message(data, websocket.headers.get("x-session"))
+            async with send_lock:
+                await websocket.send_text(orjson.dumps(result.dict()).decode())
+        finally:
+            in_flight.release()
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+
+            # Messages are JSON either way, binary frames are decoded like text frames
+            data = message.get("text")
+            if data is None:
+                data = message.get("bytes", b"").decode("utf-8", "replace")
+
+            # Stops reading messages while too many are being handled, so a fast sender is slowed down to the server
+            await in_flight.acquire()
+            task = asyncio.create_task(respond(data))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+    finally:
+        for task in pending:
+            task.cancel()
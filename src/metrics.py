@@ -0,0 +1,209 @@
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Upper bounds in seconds of the request time histogram buckets
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Seconds of injected latency for the current request. Holds a list so that time slept in tasks that copied the context
+# of the request still adds up to the same total.
+_injected_latency: ContextVar[list[float] | None] = ContextVar("injected_latency", default=None)
+
+
+def record_injected_latency(seconds: float) -> None:
+    """
+    Adds time slept by ``helpers.wait_for`` to the injected latency of the current request. Does nothing outside a
+    request that is being measured.
+
+    Parameters
+    ----------
+    seconds : float
+        Seconds slept
+    """
+    if (injected := _injected_latency.get()) is not None:
+        injected[0] += seconds
+
+
+@contextmanager
+def measure_injected_latency() -> Iterator[list[float]]:
+    """
+    Measures the injected latency of the request that is handled inside, sharing the measurement of an outer
+    middleware if there is one.
+
+    Returns
+    -------
+    injected : list[float]
+        Holds the seconds of injected latency of the request so far
+    """
+    if (injected := _injected_latency.get()) is not None:
+        yield injected
+        return
+
+    injected = [0.0]
+    token = _injected_latency.set(injected)
+    try:
+        yield injected
+    finally:
+        _injected_latency.reset(token)
+
+
+def route(scope: Scope) -> str:
+    """
+    Returns
+    -------
+    endpoint : str
+        Route of the request, with path parameters replaced by their names so every board shares one route
+    """
+    if "endpoint" not in scope:  # Did not match a route
+        return "unmatched"
+
+    path = scope["path"]
+    for name, value in scope.get("path_params", {}).items():
+        path = path.replace(str(value), "{" + name + "}")
+    return path
+
+
+class Histogram:
+    """
+    Cumulative histogram with the fixed ``BUCKETS``
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # Last bucket is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.sum += value
+
+    def render(self, name: str, labels: str) -> list[str]:
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the metric
+
+        labels : str
+            Labels for every sample, like: endpoint="/hit"
+
+        Returns
+        -------
+        lines : list[str]
+            Samples of the histogram in Prometheus text format
+        """
+        lines = []
+        total = 0
+        for bound, count in zip((*BUCKETS, "+Inf"), self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {total}")
+        return lines
+
+
+class Metrics:
+    """
+    Request times split into injected latency and compute time by endpoint, plus board counters
+    """
+
+    def __init__(self, outstanding_boards: Callable[[], int], sessions: Callable[[], int], max_boards: int):
+        """
+        Parameters
+        ----------
+        outstanding_boards : Callable[[], int]
+            Returns the current number of outstanding boards across all sessions
+
+        sessions : Callable[[], int]
+            Returns the current number of sessions
+
+        max_boards : int
+            Maximum number of outstanding boards of each session
+        """
+        self.outstanding_boards = outstanding_boards
+        self.sessions = sessions
+        self.max_boards = max_boards
+
+        self.injected: dict[str, Histogram] = {}
+        self.compute: dict[str, Histogram] = {}
+        self.boards_created = 0
+        self.boards_checked = 0
+        self.capacity_rejections = 0
+
+    def observe_request(self, endpoint: str, injected: float, total: float) -> None:
+        """
+        Parameters
+        ----------
+        endpoint : str
+            Route of the request, like /hit
+
+        injected : float
+            Seconds of the request spent in ``helpers.wait_for``
+
+        total : float
+            Seconds the whole request took
+        """
+        if endpoint not in self.injected:
+            self.injected[endpoint] = Histogram()
+            self.compute[endpoint] = Histogram()
+        self.injected[endpoint].observe(injected)
+        self.compute[endpoint].observe(max(total - injected, 0))
+
+    def render(self) -> str:
+        """
+        Returns
+        -------
+        metrics : str
+            All metrics in Prometheus text format
+        """
+        lines = [
+            "# HELP minesweeper_request_seconds Time spent on requests, split into injected latency and compute time",
+            "# TYPE minesweeper_request_seconds histogram",
+        ]
+        for endpoint in sorted(self.injected):
+            name = "minesweeper_request_seconds"
+            lines += self.injected[endpoint].render(name, f'endpoint="{endpoint}",part="injected"')
+            lines += self.compute[endpoint].render(name, f'endpoint="{endpoint}",part="compute"')
+
+        for name, kind, description, value in [
+            ("boards_created_total", "counter", "Boards given out", self.boards_created),
+            ("boards_checked_total", "counter", "Boards checked in", self.boards_checked),
+            ("capacity_rejections_total", "counter", "Boards refused because a session had max_boards outstanding",
+             self.capacity_rejections),
+            ("outstanding_boards", "gauge", "Boards currently outstanding across all sessions",
+             self.outstanding_boards()),
+            ("sessions", "gauge", "Sessions currently open", self.sessions()),
+            ("max_boards_per_session", "gauge", "Maximum number of outstanding boards of each session",
+             self.max_boards),
+        ]:
+            lines += [
+                f"# HELP minesweeper_{name} {description}",
+                f"# TYPE minesweeper_{name} {kind}",
+                f"minesweeper_{name} {value}",
+            ]
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that times every HTTP request into ``Metrics``
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        with measure_injected_latency() as injected:
+            start = time.perf_counter()
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                total = time.perf_counter() - start
+                self.metrics.observe_request(route(scope), injected[0], total)
@@ -1,11 +1,15 @@
 import itertools
-import random
+import struct
 import uuid
+from array import array
+from collections import deque
 from enum import StrEnum
-from typing import Generator, Any
+from typing import Any, Generator, Iterable
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, Field, PrivateAttr
 
+from fenwick import Fenwick2D
 from settings import BoardSettings
 
 
@@ -23,6 +27,16 @@ class Answer(BaseModel):
         super().__init__(answer=answer)
 
 
+class PoolStats(BaseModel):
+    """
+    Usage counters of the board pool, see ``pool.BoardPool``
+    """
+    size: int  # Maximum number of boards kept ready
+    ready: int  # Number of boards currently ready
+    hits: int  # Number of boards served from the pool
+    misses: int  # Number of boards that had to be generated on request
+
+
 class BoardSpaceType(StrEnum):
     """
     The types that a ``BoardSpace`` could be
@@ -46,9 +60,264 @@ class BoardSpace(BaseModel):
     flagged: bool | None = None
 
 
+class Region(BaseModel):
+    """
+    A rectangle of spaces on a board, from x, y to x + length - 1, y + height - 1
+    """
+    x: int
+    y: int
+    length: int = Field(ge=1)
+    height: int = Field(ge=1)
+
+
+class RegionStats(BaseModel):
+    """
+    Counts for a rectangle of a board, see /region
+    """
+    mines: int  # Number of mines
+    value: int  # Sum of the values of the safe spaces
+    hits: int  # Number of spaces that are hit
+    flags: int  # Number of spaces that are flagged
+
+
+class ActionType(StrEnum):
+    """
+    The actions that can be sent to /actions
+    """
+    HIT = "HIT"
+    FLAG = "FLAG"
+
+
+class Action(BaseModel):
+    """
+    A hit or flag on a space, see /actions
+    """
+    type: ActionType
+    x: int
+    y: int
+
+
+class ActionResult(BaseModel):
+    """
+    Result of a single action from /actions. Will either have the resulting space, or the reason the action failed.
+    """
+    space: BoardSpace | None = None
+    error: str | None = None
+
+
+class MessageType(StrEnum):
+    """
+    The messages that can be sent over /ws
+    """
+    BOARD = "BOARD"  # Same as /board
+    HIT = "HIT"  # Same as /hit
+    FLAG = "FLAG"  # Same as /flag
+    CHECK = "CHECK"  # Same as /check
+
+
+class Message(BaseModel):
+    """
+    A single request sent over /ws. The ``id`` is chosen by the caller and is sent back with the result, so that
+    results can be matched to requests when they come back out of order.
+    """
+    id: int | str
+    type: MessageType
+    board_id: uuid.UUID | None = None  # Not needed for BOARD
+    x: int | None = None  # Only needed for HIT/FLAG
+    y: int | None = None  # Only needed for HIT/FLAG
+
+
+class MessageResult(BaseModel):
+    """
+    Result of a single message from /ws. Will either have the result of the request, or the reason it failed.
+    """
+    id: int | str | None  # None if the message could not be read
+    result: dict[str, Any] | None = None  # Same as the response body of the matching endpoint
+    error: str | None = None
+
+
+class BoardScore(BaseModel):
+    """
+    Points a single board was worth when it was checked
+    """
+    board_id: uuid.UUID
+    score: float
+
+
+class CheckResults(BaseModel):
+    """
+    Response of /check_many
+    """
+    boards: list[BoardScore]
+    score: int  # Current score after checking
+
+
+# Each cell on a board is packed into a single byte of ``Board._cells``
+CELL_VALUE = 0b0000_1111  # Number of mines in immediate proximity (0-8)
+CELL_MINE = 0b0001_0000
+CELL_HIT = 0b0010_0000
+CELL_FLAGGED = 0b0100_0000
+
+# Running counters of a board, written before the cells by ``Board.to_bytes``
+BOARD_COUNTERS = struct.Struct("<IIII")
+
+# Boards with more spaces than this are kept as ``SparseCells``
+SPARSE_BOARD_AREA = 1_000_000
+
+# Index and cell of a touched space, written by ``SparseCells.pack``
+SPARSE_CELL = struct.Struct("<IB")
+
+
+class SparseCells:
+    """
+    Cells of a large board. Only the mines and the spaces that were touched (hit/flagged) are stored, the value of every
+    other space is counted from its neighboring mines when it is requested, so memory grows with the number of mines
+    and touched spaces instead of the area of the board. Supports the parts of ``bytearray`` that ``Board`` uses.
+    """
+
+    def __init__(self, length: int, height: int, mines: Iterable[int]):
+        """
+        Parameters
+        ----------
+        length : int
+            Length of the board
+
+        height : int
+            Height of the board
+
+        mines : Iterable[int]
+            Row-major indexes of the mines
+        """
+        self.length = length
+        self.height = height
+        self.mines = set(mines)
+        self.touched: dict[int, int] = {}
+        self._sorted_mines: np.ndarray | None = None  # Sorted indexes of the mines, built on the first region question
+
+    def __len__(self) -> int:
+        return self.length * self.height
+
+    def __getitem__(self, index: int) -> int:
+        if (cell := self.touched.get(index)) is not None:
+            return cell
+        if index in self.mines:
+            return CELL_MINE
+
+        x, y = divmod(index, self.height)
+        value = 0
+        for neighbor_x in range(max(x - 1, 0), min(x + 2, self.length)):
+            for neighbor_y in range(max(y - 1, 0), min(y + 2, self.height)):
+                value += neighbor_x * self.height + neighbor_y in self.mines
+        return value
+
+    def __setitem__(self, index: int, cell: int) -> None:
+        self.touched[index] = cell
+
+    def mines_in_region(self, x0: int, y0: int, x1: int, y1: int) -> int:
+        """
+        Counts the mines in a rectangle with a binary search of the sorted mines for each row of the rectangle, since a
+        summed-area table would take as much memory as a dense board.
+
+        Parameters
+        ----------
+        x0 : int
+        y0 : int
+            Coordinates of the first corner of the rectangle
+
+        x1 : int
+        y1 : int
+            Coordinates of the opposite corner of the rectangle, inclusive
+
+        Returns
+        -------
+        mines : int
+            Number of mines in the rectangle
+        """
+        return len(self._mines_between(x0, y0, x1, y1))
+
+    def _mines_between(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """
+        Returns
+        -------
+        mines : np.ndarray
+            Indexes of the mines in a rectangle
+        """
+        if self._sorted_mines is None:
+            self._sorted_mines = np.sort(np.fromiter(self.mines, dtype=np.int64, count=len(self.mines)))
+
+        starts = np.arange(x0, x1 + 1, dtype=np.int64) * self.height
+        before = np.searchsorted(self._sorted_mines, starts + y0, side="left")
+        through = np.searchsorted(self._sorted_mines, starts + y1, side="right")
+        return np.concatenate([self._sorted_mines[b:t] for b, t in zip(before, through)] or [np.empty(0, np.int64)])
+
+    def region_stats(self, x0: int, y0: int, x1: int, y1: int) -> RegionStats:
+        """
+        Counts for a rectangle. The value total comes from the mines around the rectangle, each adding 1 to every safe
+        neighbor inside of it, and the hits/flags come from the touched spaces, so this takes time linear to the mines
+        near the rectangle plus the touched spaces instead of the area of the rectangle.
+
+        Parameters
+        ----------
+        x0 : int
+        y0 : int
+            Coordinates of the first corner of the rectangle
+
+        x1 : int
+        y1 : int
+            Coordinates of the opposite corner of the rectangle, inclusive
+
+        Returns
+        -------
+        stats : RegionStats
+            Counts for the rectangle
+        """
+        value = 0
+        around = self._mines_between(
+            max(x0 - 1, 0), max(y0 - 1, 0), min(x1 + 1, self.length - 1), min(y1 + 1, self.height - 1)
+        )
+        for mine in around.tolist():
+            x, y = divmod(mine, self.height)
+            for neighbor_x in range(max(x - 1, x0), min(x + 1, x1) + 1):
+                for neighbor_y in range(max(y - 1, y0), min(y + 1, y1) + 1):
+                    value += neighbor_x * self.height + neighbor_y not in self.mines
+
+        hits = flags = 0
+        for index, cell in self.touched.items():
+            x, y = divmod(index, self.height)
+            if x0 <= x <= x1 and y0 <= y <= y1:
+                hits += bool(cell & CELL_HIT)
+                flags += bool(cell & CELL_FLAGGED)
+
+        return RegionStats(mines=self.mines_in_region(x0, y0, x1, y1), value=value, hits=hits, flags=flags)
+
+    def pack(self) -> bytes:
+        """
+        Returns
+        -------
+        data : bytes
+            Every touched space, see ``unpack``
+        """
+        return b"".join(SPARSE_CELL.pack(index, cell) for index, cell in self.touched.items())
+
+    def unpack(self, data: bytes) -> None:
+        """
+        Restores the touched spaces that were packed with ``pack``.
+
+        Parameters
+        ----------
+        data : bytes
+            Packed touched spaces
+        """
+        self.touched = dict(SPARSE_CELL.iter_unpack(data))
+
+
 class Board(BaseModel):
     """
     Represents a single Minesweeper board. Takes in ``BoardSettings`` to determine mines/dimensions
+
+    Cells are stored row-major in a compact ``bytearray`` (see the ``CELL_*`` bits), so a space at x, y lives at index
+    ``x * height + y``. Boards larger than ``SPARSE_BOARD_AREA`` use ``SparseCells`` instead. ``BoardSpace`` objects are
+    only built when a space is requested.
     """
     id: uuid.UUID = Field(
         default_factory=uuid.uuid4,
@@ -56,9 +325,36 @@ class Board(BaseModel):
         index=True,
         nullable=False,
     )
-    spaces: list[BoardSpace] | None = None
+    spaces: list[BoardSpace] | None = None  # Never populated by the server, kept for the response format
     settings: BoardSettings | None = None  # Most likely global board settings
 
+    _cells: bytearray | SparseCells = PrivateAttr(default_factory=bytearray)
+
+    # Running counters, kept up to date by ``hit`` and ``toggle_flag``
+    _flags: int = PrivateAttr(default=0)  # Number of flags placed
+    _mines_flagged: int = PrivateAttr(default=0)  # Number of mines that are flagged
+    _safe_hits: int = PrivateAttr(default=0)  # Number of non-mine spaces that are hit
+    _hit_value: int = PrivateAttr(default=0)  # Sum of the values of all hit value spaces
+
+    # Hits/flags since the last ``drain_events``, as ``index << 1`` for hits and ``index << 1 | 1`` for flags, see
+    # ``replay``. Only recorded once ``record_events`` is called, by the journal and the sqlite state backend
+    _events: array | None = PrivateAttr(default=None)
+    _version: int = PrivateAttr(default=0)  # Number of hits/flags so far
+
+    # Version at which every cell last changed, by index (an array for dense boards, a dict of the changed cells for
+    # sparse boards), for ``changed_rows``. Only kept once ``track_changes`` is called, from version ``_tracked_since``
+    _stamps: np.ndarray | dict[int, int] | None = PrivateAttr(default=None)
+    _tracked_since: int | None = PrivateAttr(default=None)
+
+    # Summed-area tables of the mines and of the values of the safe spaces of a dense board, built on the first region
+    # question since they take several times the memory of the cells. Mines never move, so they are never out of date
+    _sums: np.ndarray | None = PrivateAttr(default=None)
+
+    # Hit/flagged spaces of a dense board, built on the first region question and kept up to date by ``hit`` and
+    # ``toggle_flag`` from then on
+    _hit_counts: Fenwick2D | None = PrivateAttr(default=None)
+    _flag_counts: Fenwick2D | None = PrivateAttr(default=None)
+
     def __str__(self) -> str:
         """
         Prints a textual/graphical representation of the Minesweeper board. This really assumes that the print font will
@@ -68,24 +364,20 @@ class Board(BaseModel):
         -------
         Monospace textart representation of Minesweeper board
         """
-        output = ""
-        current_x = 0
-
-        for space in self:
-            if current_x != space.x:
-                output += "\n"
-                current_x = space.x
-
-            match space:
-                case BoardSpace(type=BoardSpaceType.BLANK):
-                    output += " _ "
-                case BoardSpace(type=BoardSpaceType.VALUE) as space:
-                    output += " " + str(space.value) + " "
-                case BoardSpace(type=BoardSpaceType.MINE):
-                    output += " * "
-                case _:
-                    raise ValueError(f"Unhandled type: {space.type}")
-        return output
+        rows = []
+        height = self.settings.height
+
+        for row_start in range(0, len(self._cells), height):
+            row = ""
+            for cell in map(self._cells.__getitem__, range(row_start, row_start + height)):
+                if cell & CELL_MINE:
+                    row += " * "
+                elif cell & CELL_VALUE:
+                    row += " " + str(cell & CELL_VALUE) + " "
+                else:
+                    row += " _ "
+            rows.append(row)
+        return "\n".join(rows)
 
     def __getitem__(self, item: tuple[int, int] | BoardSpace) -> BoardSpace:
         """
@@ -102,6 +394,33 @@ class Board(BaseModel):
         space : BoardSpace
             Space at coordinates
         """
+        return self._space_at(self._index(item))
+
+    def __iter__(self) -> Generator[BoardSpace, None, None]:
+        """
+        Iterates through the spaces of the board. Iterates starting from 0, 0. Iterates through all y's then all x's
+
+        Returns
+        -------
+        BoardSpace generator
+        """
+        for index in range(len(self._cells)):
+            yield self._space_at(index)
+
+    def _index(self, item: tuple[int, int] | BoardSpace) -> int:
+        """
+        Converts x, y coordinates to an index into ``self._cells``.
+
+        Parameters
+        ----------
+        item : tuple[int, int] | BoardSpace
+            x,y coordinates of space, or a ``BoardSpace`` object to take the x/y values from
+
+        Returns
+        -------
+        index : int
+            Row-major index of the space
+        """
         match item:
             case int(x), int(y):
                 x, y = x, y
@@ -114,34 +433,465 @@ class Board(BaseModel):
             raise IndexError(
                 f"Coordinates: {x, y} out-of-range. Board dimensions: {self.settings.length}x{self.settings.height}"
             )
+        return x * self.settings.height + y
 
-        space = next((s for s in self.spaces if s.x == x and s.y == y), None)
-        if not space:
-            raise ValueError(
-                f"Somehow don't have space for coordinates: {item} even though it is in range of "
-                f"{self.settings.length}x{self.settings.height} board"
-            )
+    def _space_at(self, index: int) -> BoardSpace:
+        """
+        Builds the ``BoardSpace`` for a cell.
 
-        return space
+        Parameters
+        ----------
+        index : int
+            Row-major index of the space
 
-    def __iter__(self) -> Generator[BoardSpace, None, None]:
+        Returns
+        -------
+        space : BoardSpace
+            Space at the index
         """
-        Iterates through the ``BoardSpace`` objects in ``self.spaces``. Iterates starting from 0, 0. Iterates through
-        all y's then all x's
+        cell = self._cells[index]
+        x, y = divmod(index, self.settings.height)
+
+        if cell & CELL_MINE:
+            type_, value = BoardSpaceType.MINE, 1  # For obfuscation
+        elif value := cell & CELL_VALUE:
+            type_ = BoardSpaceType.VALUE
+        else:
+            type_ = BoardSpaceType.BLANK
+
+        # Every field is already the right type, so validation is skipped
+        return BoardSpace.construct(
+            x=x,
+            y=y,
+            value=value,
+            type=type_,
+            hit=bool(cell & CELL_HIT),
+            flagged=bool(cell & CELL_FLAGGED)
+        )
+
+    def hit(self, item: tuple[int, int] | BoardSpace) -> BoardSpace:
+        """
+        Marks a space as hit. Hitting a space will remove any flag on it.
+
+        Parameters
+        ----------
+        item : tuple[int, int] | BoardSpace
+            Coordinates of the space to hit
 
         Returns
         -------
-        BoardSpace generator
+        space : BoardSpace
+            Space after it was hit
+        """
+        index = self._index(item)
+        self._hit_index(index)
+        return self._space_at(index)
+
+    def _hit_index(self, index: int) -> None:
+        """
+        Marks the space at an index as hit, see ``hit``
+        """
+        cell = self._cells[index]
+
+        if cell & CELL_FLAGGED:
+            self._flags -= 1
+            self._mines_flagged -= bool(cell & CELL_MINE)
+        if not cell & (CELL_HIT | CELL_MINE):
+            self._safe_hits += 1
+            self._hit_value += cell & CELL_VALUE
+        if self._hit_counts is not None:
+            x, y = divmod(index, self.settings.height)
+            if not cell & CELL_HIT:
+                self._hit_counts.add(x, y, 1)
+            if cell & CELL_FLAGGED:
+                self._flag_counts.add(x, y, -1)
+
+        self._cells[index] = (cell | CELL_HIT) & ~CELL_FLAGGED
+        if self._events is not None:
+            self._events.append(index << 1)
+        self._version += 1
+        if self._stamps is not None:
+            self._stamps[index] = self._version
+
+    def reveal(
+        self,
+        item: tuple[int, int] | BoardSpace,
+        limit: int | None = None
+    ) -> tuple[list[tuple[int, int]], bool]:
+        """
+        Hits a space, and if it is blank, keeps hitting outward through the connected blank spaces and the value spaces
+        that border them, like clicking a blank space in Windows Minesweeper. Flagged spaces are left alone. Runs in
+        time linear to the number of spaces revealed, and stops after ``limit`` spaces. The rest of the area can be
+        revealed by revealing the spaces that are still not hit around the blank spaces that were.
+
+        Parameters
+        ----------
+        item : tuple[int, int] | BoardSpace
+            Coordinates of the space to start from
+
+        limit : int | None
+            Most spaces to hit, None hits the whole area
+
+        Returns
+        -------
+        cells, truncated : tuple[list[tuple[int, int]], bool]
+            Row-major index and cell bits of every space that was hit, starting with the given space, and whether the
+            reveal stopped at ``limit`` before the whole area was hit
+        """
+        start = self._index(item)
+        self._hit_index(start)
+        revealed = [start]
+
+        queue = deque(revealed if not self._cells[start] & (CELL_MINE | CELL_VALUE) else ())
+        while queue:
+            for neighbor in self._neighbor_indexes(queue.popleft()):
+                cell = self._cells[neighbor]
+                if cell & (CELL_HIT | CELL_FLAGGED | CELL_MINE):
+                    continue
+                if limit is not None and len(revealed) >= limit:
+                    return [(index, self._cells[index]) for index in revealed], True
+
+                self._hit_index(neighbor)
+                revealed.append(neighbor)
+                if not cell & CELL_VALUE:
+                    queue.append(neighbor)
+
+        return [(index, self._cells[index]) for index in revealed], False
+
+    def toggle_flag(self, item: tuple[int, int] | BoardSpace) -> BoardSpace:
+        """
+        Toggles the flag on a space.
+
+        Parameters
+        ----------
+        item : tuple[int, int] | BoardSpace
+            Coordinates of the space to flag
+
+        Returns
+        -------
+        space : BoardSpace
+            Space after the flag was toggled
+        """
+        index = self._index(item)
+        self._toggle_flag_index(index)
+        return self._space_at(index)
+
+    def _toggle_flag_index(self, index: int) -> None:
+        """
+        Toggles the flag on the space at an index, see ``toggle_flag``
+        """
+        cell = self._cells[index] ^ CELL_FLAGGED
+        change = 1 if cell & CELL_FLAGGED else -1
+
+        self._flags += change
+        if cell & CELL_MINE:
+            self._mines_flagged += change
+        if self._flag_counts is not None:
+            self._flag_counts.add(*divmod(index, self.settings.height), change)
+
+        self._cells[index] = cell
+        if self._events is not None:
+            self._events.append(index << 1 | 1)
+        self._version += 1
+        if self._stamps is not None:
+            self._stamps[index] = self._version
+
+    def record_events(self) -> None:
         """
-        for x, y in itertools.product(range(self.settings.length), range(self.settings.height)):
-            space = next((s for s in self.spaces if s.x == x and s.y == y), None)
-            if not space:
-                raise ValueError(
-                    f"Somehow don't have space for coordinates: {x, y} even though it is in range of "
-                    f"{self.settings.length}x{self.settings.height} board"
-                )
+        Starts recording the hits/flags on the board for ``drain_events``, dropping any that were recorded so far.
+        """
+        self._events = array("I")
 
-            yield space
+    def drain_events(self) -> array:
+        """
+        Returns
+        -------
+        events : array
+            Hits/flags on the board in order since ``record_events`` or the last call, see ``replay``. Empty if events
+            are not recorded
+        """
+        events = self._events
+        if events is None:
+            return array("I")
+        self._events = array("I")
+        return events
+
+    def drain_changed_cells(self) -> list[tuple[int, int, int]]:
+        """
+        Returns
+        -------
+        cells : list[tuple[int, int, int]]
+            Index, current cell bits and the version it last changed at of every cell that was hit/flagged since
+            ``record_events`` or the last call, see ``drain_events``
+        """
+        events = self.drain_events()
+        first = self._version - len(events)
+        versions = {event >> 1: version for version, event in enumerate(events, first + 1)}
+        return [(index, self._cells[index], version) for index, version in versions.items()]
+
+    @property
+    def version(self) -> int:
+        """
+        Returns
+        -------
+        version : int
+            Number of hits/flags on the board so far, goes up with every change to the board
+        """
+        return self._version
+
+    @property
+    def tracked_since(self) -> int | None:
+        """
+        Returns
+        -------
+        version : int | None
+            Version after which ``changed_rows`` knows every change, None until ``track_changes`` is called
+        """
+        return self._tracked_since
+
+    def track_changes(self, stamps: Iterable[tuple[int, int]] | None = None) -> None:
+        """
+        Starts keeping the version at which every cell last changed, so ``changed_rows`` can find the changes after a
+        version without going through every hit/flag. Does nothing if changes are already tracked.
+
+        Parameters
+        ----------
+        stamps : Iterable[tuple[int, int]] | None
+            Index and the version it last changed at of every cell that was ever hit/flagged, so every change is known
+            (see ``drain_changed_cells``). Without it, only changes from now on are known
+        """
+        if self._stamps is not None:
+            return
+
+        self._tracked_since = self._version if stamps is None else 0
+        stamps = np.array(list(stamps or ()), dtype=np.int64).reshape(-1, 2)
+        if isinstance(self._cells, SparseCells):
+            self._stamps = dict(stamps.tolist())
+        else:
+            self._stamps = np.zeros(len(self._cells), dtype=np.uint32)
+            self._stamps[stamps[:, 0]] = stamps[:, 1]
+
+    def changed_rows(self, since: int = 0) -> Generator[tuple[int, list[int], list[int]], None, None]:
+        """
+        Gets the cells that were hit/flagged after a version of the board, row by row, without building a
+        ``BoardSpace`` for each. What is needed is copied before returning, and rows are only listed as they are
+        walked, so the rows can be streamed out after the board changes again.
+
+        Parameters
+        ----------
+        since : int
+            Version of the board to get the changes after, 0 gets every cell that is hit/flagged. Unless it is 0, it
+            must be at least ``tracked_since``
+
+        Returns
+        -------
+        Generator of the x, the y of every changed cell and the current cell bits of every changed cell, for each row
+        with changes in order of x. Cells that were unflagged after the version are included, unless ``since`` is 0.
+        """
+        sparse = isinstance(self._cells, SparseCells)
+        if not since and not sparse:
+            # A copy of the cells is smaller than a list of every hit/flagged cell
+            grid = np.frombuffer(bytes(self._cells), dtype=np.uint8).reshape(self.settings.length, self.settings.height)
+            return _grid_rows(grid)
+
+        if not since:
+            touched = self._cells.touched
+            indexes = np.fromiter(touched.keys(), dtype=np.int64, count=len(touched))
+            cells = np.fromiter(touched.values(), dtype=np.uint8, count=len(touched))
+            changed = cells & (CELL_HIT | CELL_FLAGGED) != 0
+            indexes, cells = indexes[changed], cells[changed]
+        elif sparse:
+            indexes = np.array([index for index, version in self._stamps.items() if version > since], dtype=np.int64)
+            cells = np.array([self._cells[index] for index in indexes.tolist()], dtype=np.uint8)
+        else:
+            indexes = np.flatnonzero(self._stamps > since)
+            cells = np.frombuffer(self._cells, dtype=np.uint8)[indexes]
+
+        order = np.argsort(indexes)
+        xs, ys = np.divmod(indexes[order], self.settings.height)
+        return _split_rows(xs, ys, cells[order])
+
+    def apply_cells(self, cells: Iterable[tuple[int, int, int]], version: int) -> None:
+        """
+        Catches up with the changes made to another copy of this board, see ``drain_changed_cells``.
+
+        Parameters
+        ----------
+        cells : Iterable[tuple[int, int, int]]
+            Index, cell bits and the version it last changed at of every cell that changed on the other copy
+
+        version : int
+            Version of the other copy
+        """
+        height = self.settings.height
+        for index, bits, changed_at in cells:
+            cell = self._cells[index]
+            hit = bool(bits & CELL_HIT) - bool(cell & CELL_HIT)
+            flagged = bool(bits & CELL_FLAGGED) - bool(cell & CELL_FLAGGED)
+
+            self._flags += flagged
+            if cell & CELL_MINE:
+                self._mines_flagged += flagged
+            else:
+                self._safe_hits += hit
+                self._hit_value += hit * (cell & CELL_VALUE)
+            if self._hit_counts is not None:
+                x, y = divmod(index, height)
+                if hit:
+                    self._hit_counts.add(x, y, hit)
+                if flagged:
+                    self._flag_counts.add(x, y, flagged)
+
+            self._cells[index] = bits
+            if self._stamps is not None:
+                self._stamps[index] = changed_at
+        self._version = version
+
+    def replay(self, events: Iterable[int]) -> None:
+        """
+        Applies hits/flags that were recorded by ``drain_events`` on another copy of this board.
+
+        Parameters
+        ----------
+        events : Iterable[int]
+            Hits/flags to apply, in order
+        """
+        for event in events:
+            if event & 1:
+                self._toggle_flag_index(event >> 1)
+            else:
+                self._hit_index(event >> 1)
+
+    @property
+    def unhit_safe_spaces(self) -> int:
+        """
+        Returns
+        -------
+        count : int
+            Number of safe spaces that have not been hit yet
+        """
+        return len(self._cells) - self.settings.mines - self._safe_hits
+
+    def _corners(self, region: Region) -> tuple[int, int, int, int]:
+        """
+        Returns
+        -------
+        corners : tuple[int, int, int, int]
+            x0, y0, x1, y1 of the rectangle, inclusive. Raises an IndexError if it isn't fully on the board
+        """
+        x0, y0 = region.x, region.y
+        x1, y1 = x0 + region.length - 1, y0 + region.height - 1
+        self._index((x0, y0))
+        self._index((x1, y1))
+        return x0, y0, x1, y1
+
+    def _build_sums(self) -> None:
+        """
+        Builds the summed-area tables of a dense board from its cells.
+        """
+        length, height = self.settings.length, self.settings.height
+        cells = np.frombuffer(self._cells, dtype=np.uint8).reshape(length, height)
+        mines = (cells & CELL_MINE) > 0
+        values = np.where(mines, 0, cells & CELL_VALUE)
+        self._sums = np.zeros((2, length + 1, height + 1), dtype=np.int32)
+        self._sums[0, 1:, 1:] = mines.cumsum(axis=0, dtype=np.int32).cumsum(axis=1)
+        self._sums[1, 1:, 1:] = values.cumsum(axis=0, dtype=np.int32).cumsum(axis=1)
+
+    def _region_sums(self, x0: int, y0: int, x1: int, y1: int) -> tuple[int, int]:
+        """
+        Returns
+        -------
+        mines, value : tuple[int, int]
+            Number of mines and sum of the values of the safe spaces in a rectangle of a dense board
+        """
+        if self._sums is None:
+            self._build_sums()
+
+        sums = self._sums
+        totals = sums[:, x1 + 1, y1 + 1] - sums[:, x0, y1 + 1] - sums[:, x1 + 1, y0] + sums[:, x0, y0]
+        return int(totals[0]), int(totals[1])
+
+    def mines_in_region(self, region: Region) -> int:
+        """
+        Counts the mines in a rectangle of the board in constant time, from a summed-area table of the mines.
+
+        Parameters
+        ----------
+        region : Region
+            Rectangle to count the mines in, must be fully on the board
+
+        Returns
+        -------
+        mines : int
+            Number of mines in the rectangle
+        """
+        x0, y0, x1, y1 = self._corners(region)
+        if isinstance(self._cells, SparseCells):
+            return self._cells.mines_in_region(x0, y0, x1, y1)
+        return self._region_sums(x0, y0, x1, y1)[0]
+
+    def region_stats(self, region: Region) -> RegionStats:
+        """
+        Counts the mines, value total and hit/flagged spaces in a rectangle of the board. Mines and values come from
+        summed-area tables, hits/flags from Fenwick trees, so each count takes constant or logarithmic time no matter
+        the size of the rectangle.
+
+        Parameters
+        ----------
+        region : Region
+            Rectangle to count in, must be fully on the board
+
+        Returns
+        -------
+        stats : RegionStats
+            Counts for the rectangle
+        """
+        x0, y0, x1, y1 = self._corners(region)
+        if isinstance(self._cells, SparseCells):
+            return self._cells.region_stats(x0, y0, x1, y1)
+
+        if self._hit_counts is None:
+            cells = np.frombuffer(self._cells, dtype=np.uint8).reshape(self.settings.length, self.settings.height)
+            self._hit_counts = Fenwick2D.from_counts(cells & CELL_HIT != 0)
+            self._flag_counts = Fenwick2D.from_counts(cells & CELL_FLAGGED != 0)
+
+        mines, value = self._region_sums(x0, y0, x1, y1)
+        return RegionStats(
+            mines=mines,
+            value=value,
+            hits=self._hit_counts.sum(x0, y0, x1, y1),
+            flags=self._flag_counts.sum(x0, y0, x1, y1)
+        )
+
+    @property
+    def flags(self) -> int:
+        """
+        Returns
+        -------
+        flags : int
+            Number of flags currently placed on the board
+        """
+        return self._flags
+
+    @property
+    def score(self) -> float:
+        """
+        Calculates the points that the board is worth if it were checked in its current state.
+
+        Returns
+        -------
+        score : float
+            Points for the board
+        """
+        # Flat Processing bonus equal to length and height of the board
+        board_score = self.settings.length + self.settings.height
+
+        # Add up all safe, value spaces that were hit
+        board_score += self._hit_value
+
+        # Penalty for accuracy
+        accuracy = self._mines_flagged / self.settings.mines
+        return board_score * accuracy
 
     @property
     def is_correct(self) -> bool:
@@ -156,86 +906,131 @@ class Board(BaseModel):
         result : bool
             True if the board is currently correct, False if not
         """
-        all_mines_are_flagged = all(
-            space.flagged
-            for space in self
-            if space.type == BoardSpaceType.MINE
-        )
-        all_safe_spaces_are_hit = all(
-            space.hit
-            for space in self
-            if space.type != BoardSpaceType.MINE
-        )
+        all_mines_are_flagged = self._mines_flagged == self.settings.mines
+        all_safe_spaces_are_hit = self._safe_hits == len(self._cells) - self.settings.mines
 
         return all_mines_are_flagged and all_safe_spaces_are_hit
 
+    def to_bytes(self) -> bytes:
+        """
+        Packs the state of the board into bytes, see ``from_bytes``. The ID and settings are not included.
+
+        Returns
+        -------
+        data : bytes
+            Running counters followed by the cells of the board
+        """
+        counters = BOARD_COUNTERS.pack(self._flags, self._mines_flagged, self._safe_hits, self._hit_value)
+        if isinstance(self._cells, SparseCells):
+            return counters + self._cells.pack()
+        return counters + self._cells
+
+    @classmethod
+    def from_bytes(cls, board_id: uuid.UUID, settings: BoardSettings, data: bytes):
+        """
+        Unpacks a board that was packed with ``to_bytes``.
+
+        Parameters
+        ----------
+        board_id : uuid.UUID
+            ID of the board
+
+        settings : BoardSettings
+            Dimensions/mines of the board
+
+        data : bytes
+            Packed board state
+
+        Returns
+        -------
+        Board object
+        """
+        obj = cls(id=board_id, settings=settings)
+        obj._flags, obj._mines_flagged, obj._safe_hits, obj._hit_value = BOARD_COUNTERS.unpack_from(data)
+        if settings.length * settings.height > SPARSE_BOARD_AREA:
+            obj._cells = SparseCells(settings.length, settings.height, obj._mine_indexes().tolist())
+            obj._cells.unpack(data[BOARD_COUNTERS.size:])
+        else:
+            obj._cells = bytearray(data[BOARD_COUNTERS.size:])
+        return obj
+
+    def _mine_indexes(self) -> np.ndarray:
+        """
+        Picks the mines of the board, seeded by ``self.id`` so the same ID always gets the same mines.
+
+        Returns
+        -------
+        mines : np.ndarray
+            Row-major indexes of the mines
+        """
+        settings = self.settings
+        rng = np.random.default_rng(self.id.int)
+        return rng.choice(settings.length * settings.height, size=settings.mines, replace=False)
+
     @classmethod
-    def new(cls, settings: BoardSettings):
+    def new(cls, settings: BoardSettings, board_id: uuid.UUID | None = None):
         """
-        Creates a new randomized Minesweeper board. Randomness based on ``self.id``
+        Creates a new randomized Minesweeper board. Randomness based on ``self.id``, so passing the ``board_id`` of an
+        existing board will regenerate the same layout.
+
+        Parameters
+        ----------
+        settings : BoardSettings
+            Dimensions/mines of the board
+
+        board_id : uuid.UUID | None
+            ID to give the board, a new one will be generated if not provided
 
         Returns
         -------
         Board object
         """
-        obj = cls(spaces=[], settings=settings)
-        random.seed(obj.id.int)
+        obj = cls(settings=settings) if board_id is None else cls(id=board_id, settings=settings)
+        length, height = settings.length, settings.height
+        mine_indexes = obj._mine_indexes()
+
+        if length * height > SPARSE_BOARD_AREA:
+            obj._cells = SparseCells(length, height, mine_indexes.tolist())
+            return obj
 
         # Adds mines randomly on 2d plane of dimensions specified in settings
-        available_coordinates = list(itertools.product(range(settings.length), range(settings.height)))
-        obj.spaces.extend(
-            BoardSpace(
-                x=x,
-                y=y,
-                value=1,  # For obfuscation,
-                type=BoardSpaceType.MINE,
-                hit=False,
-                flagged=False
-            )
-            for x, y in [
-                available_coordinates.pop(random.randrange(len(available_coordinates)))
-                for _ in range(settings.mines)
-            ]
-        )
+        mines = np.zeros(length * height, dtype=np.uint8)
+        mines[mine_indexes] = 1
+        mines = mines.reshape(length, height)
 
-        # Adds value spaces according to mine neighbors
-        mine_spaces = (space for space in obj.spaces if space.type == BoardSpaceType.MINE)
-        for mine_space in mine_spaces:
-            for neighbor in obj.get_neighbors(mine_space):
-                match neighbor:
-                    # If there is already a node created at the neighboring spot, increment the nearby-mine value
-                    case BoardSpace() as space:
-                        space.value += 1
-                    case int(x), int(y):  # If x, y coords get returned, then the space has not been created yet
-                        obj.spaces.append(
-                            BoardSpace(
-                                x=x,
-                                y=y,
-                                value=1,
-                                type=BoardSpaceType.VALUE,
-                                hit=False,
-                                flagged=False
-                            )
-                        )
-                        available_coordinates.remove((x, y))
-                    case _:
-                        raise ValueError(f"Unexpected neighbor value: {neighbor}")
-
-        # Adds remaining blank spaces
-        obj.spaces.extend(
-            BoardSpace(
-                x=x,
-                y=y,
-                value=0,
-                type=BoardSpaceType.BLANK,
-                hit=False,
-                flagged=False
-            )
-            for x, y in available_coordinates
-        )
+        # Counts nearby mines for every space by summing the shifted copies of the mine grid
+        padded = np.zeros((length + 2, height + 2), dtype=np.uint8)
+        padded[1:-1, 1:-1] = mines
+        values = sum(
+            padded[dx:dx + length, dy:dy + height]
+            for dx, dy in itertools.product(range(3), range(3))
+        ) - mines
+
+        obj._cells = bytearray(np.where(mines, CELL_MINE, values).astype(np.uint8).tobytes())
         return obj
 
-    def get_neighbors(self, space: BoardSpace) -> Generator[BoardSpace | tuple[int, int], None, None]:
+    def _neighbor_indexes(self, index: int) -> Generator[int, None, None]:
+        """
+        Gets the indexes of all in-range neighbors of a cell, starting from the top left neighbor.
+
+        Parameters
+        ----------
+        index : int
+            Row-major index of the space to get neighbors for
+
+        Returns
+        -------
+        Generator of neighboring indexes into ``self._cells``
+        """
+        length, height = self.settings.length, self.settings.height
+        x, y = divmod(index, height)
+
+        for neighbor_x in range(max(x - 1, 0), min(x + 2, length)):
+            for neighbor_y in range(max(y - 1, 0), min(y + 2, height)):
+                if neighbor_x != x or neighbor_y != y:  # Need to skip self
+                    yield neighbor_x * height + neighbor_y
+
+    def get_neighbors(self, space: BoardSpace) -> Generator[BoardSpace, None, None]:
         """
         Gets all neighbors for a given space. By definition, a space can have a maximum of 8 neighbors and a minimum of
         3 (if the space is in a corner).
@@ -247,16 +1042,38 @@ class Board(BaseModel):
 
         Returns
         -------
-        Generator of neighboring ``BoardSpace`` objects. Returns neighbor nodes starting from the immediate left
-        neighbor, and then rotating clockwise. If there is no ``BoardSpace`` at a neighbors coordinates and the coords
-        are in range, this will instead return the coordinates. See ``self.new`` for use
-        """
-        for neighbor_coords in itertools.product(range(space.x - 1, space.x + 2), range(space.y - 1, space.y + 2)):
-            if neighbor_coords == (space.x, space.y):  # Need to skip self
-                continue
-            try:
-                yield self[neighbor_coords]
-            except IndexError:  # Current node must be an edge, so neighbor is off the board
-                continue
-            except ValueError:  # Current node is not created yet
-                yield neighbor_coords
+        Generator of neighboring ``BoardSpace`` objects
+        """
+        for index in self._neighbor_indexes(self._index(space)):
+            yield self._space_at(index)
+
+
+def _grid_rows(grid: np.ndarray) -> Generator[tuple[int, list[int], list[int]], None, None]:
+    """
+    Finds the hit/flagged cells of a grid of cells one row at a time, see ``Board.changed_rows``
+    """
+    for x, row in enumerate(grid):
+        ys = np.flatnonzero(row & (CELL_HIT | CELL_FLAGGED))
+        if ys.size:
+            yield x, ys.tolist(), row[ys].tolist()
+
+
+def _split_rows(
+    xs: np.ndarray,
+    ys: np.ndarray,
+    cells: np.ndarray
+) -> Generator[tuple[int, list[int], list[int]], None, None]:
+    """
+    Splits cells sorted by x then y into rows, see ``Board.changed_rows``
+    """
+    bounds = np.flatnonzero(np.diff(xs, prepend=-1)).tolist() + [len(xs)]
+    for start, end in itertools.pairwise(bounds):
+        yield int(xs[start]), ys[start:end].tolist(), cells[start:end].tolist()
+
+
+class NewBoards(BaseModel):
+    """
+    Response of /boards
+    """
+    boards: list[Board]
+    score: int  # Current score
@@ -0,0 +1,124 @@
+import asyncio
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Literal
+
+from models import Board, SPARSE_BOARD_AREA
+from settings import BoardSettings
+
+OffloadKind = Literal["none", "thread", "process"]
+
+
+def new_board(settings: BoardSettings) -> tuple[bytes, bytes]:
+    """
+    Generates a board in a worker process.
+
+    Returns
+    -------
+    board : tuple[bytes, bytes]
+        ID and packed state of the board, see ``Board.to_bytes``
+    """
+    board = Board.new(settings)
+    return board.id.bytes, board.to_bytes()
+
+
+class Offloader:
+    """
+    Runs CPU-heavy board work in a thread or process pool, so that large boards do not stall the event loop and every
+    in-flight latency sleep along with it. Work on boards smaller than ``min_area`` is left to the caller, since it
+    takes less time than handing it to the pool.
+
+    Boards come back from worker processes in their packed form, which is just their cells, see ``Board.to_bytes``.
+    """
+
+    def __init__(self, kind: OffloadKind, workers: int, min_area: int):
+        """
+        Parameters
+        ----------
+        kind : OffloadKind
+            Pool to run the work in, "none" disables offloading
+
+        workers : int
+            Number of threads/processes in the pool
+
+        min_area : int
+            Number of spaces a board needs for its work to be offloaded
+        """
+        self.kind = kind
+        self.workers = workers
+        self.min_area = min_area
+
+        self._executor: Executor | None = None
+
+    async def start(self) -> None:
+        """
+        Starts the pool. Does nothing if offloading is disabled.
+        """
+        match self.kind:
+            case "thread":
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="offload")
+            case "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                # Forks every worker process now, before the state backend opens its database at startup
+                await asyncio.get_running_loop().run_in_executor(self._executor, int)
+
+    async def stop(self) -> None:
+        """
+        Shuts down the pool, waiting for the work that already started.
+        """
+        if self._executor:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def runs(self, settings: BoardSettings) -> bool:
+        """
+        Parameters
+        ----------
+        settings : BoardSettings
+            Dimensions/mines of the board
+
+        Returns
+        -------
+        result : bool
+            True if boards with these settings can be generated in the pool, no matter how small they are
+        """
+        if self._executor is None:
+            return False
+
+        # Sparse boards would spend as long rebuilding their set of mines from the packed form as generating it
+        return self.kind == "thread" or settings.length * settings.height <= SPARSE_BOARD_AREA
+
+    def offloads(self, settings: BoardSettings) -> bool:
+        """
+        Parameters
+        ----------
+        settings : BoardSettings
+            Dimensions/mines of the board
+
+        Returns
+        -------
+        result : bool
+            True if work on a board with these settings is run in the pool
+        """
+        return settings.length * settings.height >= self.min_area and self.runs(settings)
+
+    async def new_board(self, settings: BoardSettings) -> Board:
+        """
+        Generates a new board in the pool, see ``runs``.
+
+        Parameters
+        ----------
+        settings : BoardSettings
+            Dimensions/mines of the board
+
+        Returns
+        -------
+        board : Board
+            New board
+        """
+        loop = asyncio.get_running_loop()
+        if self.kind == "thread":
+            return await loop.run_in_executor(self._executor, Board.new, settings)
+
+        board_id, data = await loop.run_in_executor(self._executor, new_board, settings)
+        return Board.from_bytes(uuid.UUID(bytes=board_id), settings, data)
@@ -0,0 +1,127 @@
+import asyncio
+
+from models import Board, PoolStats
+from offload import Offloader
+from settings import BoardSettings
+
+
+class BoardPool:
+    """
+    Bounded queue of boards that are generated ahead of time, so that /board does not have to generate a board on the
+    event loop. The queue is refilled in the background by the pool of the ``Offloader``, so the pool stays empty if
+    offloading is disabled or the offloader can't generate the boards (sparse boards in worker processes).
+    """
+
+    def __init__(self, settings: BoardSettings, size: int, workers: int, offloader: Offloader):
+        """
+        Parameters
+        ----------
+        settings : BoardSettings
+            Settings to generate boards with
+
+        size : int
+            Maximum number of boards to keep ready, 0 disables the pool
+
+        workers : int
+            Number of boards to generate at once, in the pool of the offloader
+
+        offloader : Offloader
+            Generates boards that are not ready in the pool, if they are large enough
+        """
+        self.settings = settings
+        self.size = size
+        self.workers = workers
+        self.offloader = offloader
+        self.hits = 0
+        self.misses = 0
+
+        self._boards: asyncio.Queue[Board] = asyncio.Queue(maxsize=size)
+        self._refill_tasks: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """
+        Starts refilling the pool in the background. Does nothing if the pool is disabled or the offloader can't
+        generate its boards. Needs the offloader to be started first.
+        """
+        if not self.size or not self.offloader.runs(self.settings):
+            return
+
+        self._refill_tasks = [asyncio.create_task(self._refill()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """
+        Stops refilling the pool.
+        """
+        for task in self._refill_tasks:
+            task.cancel()
+        await asyncio.gather(*self._refill_tasks, return_exceptions=True)
+        self._refill_tasks = []
+
+    async def _refill(self) -> None:
+        """
+        Generates boards in the pool of the offloader forever, waiting whenever the pool is full.
+        """
+        while True:
+            await self._boards.put(await self.offloader.new_board(self.settings))
+
+    def get(self) -> Board:
+        """
+        Takes a ready board from the pool. If none are ready, a board will be generated on the spot.
+
+        Returns
+        -------
+        board : Board
+            New board
+        """
+        try:
+            board = self._boards.get_nowait()
+        except asyncio.QueueEmpty:
+            self.misses += 1
+            return Board.new(settings=self.settings)
+
+        self.hits += 1
+        return board
+
+    @property
+    def offloads(self) -> bool:
+        """
+        Returns
+        -------
+        result : bool
+            True if boards that are not ready in the pool are generated by the offloader, so ``take`` should be used
+            instead of ``get``
+        """
+        return self.offloader.offloads(self.settings)
+
+    async def take(self) -> Board:
+        """
+        Takes a ready board from the pool. If none are ready, a board will be generated by the offloader.
+
+        Returns
+        -------
+        board : Board
+            New board
+        """
+        try:
+            board = self._boards.get_nowait()
+        except asyncio.QueueEmpty:
+            self.misses += 1
+            return await self.offloader.new_board(self.settings)
+
+        self.hits += 1
+        return board
+
+    @property
+    def stats(self) -> PoolStats:
+        """
+        Returns
+        -------
+        stats : PoolStats
+            Current usage counters of the pool
+        """
+        return PoolStats(
+            size=self.size,
+            ready=self._boards.qsize(),
+            hits=self.hits,
+            misses=self.misses
+        )
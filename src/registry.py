@@ -0,0 +1,112 @@
+from typing import Iterator
+from uuid import UUID
+
+from fastapi import HTTPException
+
+from models import Board
+
+
+class BoardRegistry:
+    """
+    Outstanding boards (boards that have been requested but not checked in), indexed by ID
+    """
+
+    def __init__(self, max_boards: int, record_events: bool = False):
+        """
+        Parameters
+        ----------
+        max_boards : int
+            Maximum number of outstanding boards to allow
+
+        record_events : bool
+            Whether boards record their hits/flags from when they are given out, for ``snapshots.Journal`` to save
+        """
+        self.max_boards = max_boards
+        self.record_events = record_events
+        self._boards: dict[UUID, Board] = {}
+
+    def __len__(self) -> int:
+        return len(self._boards)
+
+    def __contains__(self, board_id: UUID) -> bool:
+        return board_id in self._boards
+
+    def __iter__(self) -> Iterator[Board]:
+        return iter(self._boards.values())
+
+    @property
+    def is_full(self) -> bool:
+        """
+        Returns
+        -------
+        result : bool
+            True if no more boards can be given out until one is checked in
+        """
+        return len(self._boards) >= self.max_boards
+
+    @property
+    def available(self) -> int:
+        """
+        Returns
+        -------
+        available : int
+            Number of boards that can be given out before one has to be checked in
+        """
+        return max(self.max_boards - len(self._boards), 0)
+
+    def add(self, board: Board) -> None:
+        """
+        Adds a board to the outstanding boards.
+
+        Parameters
+        ----------
+        board : Board
+            Board that is being given out
+        """
+        if self.record_events:
+            board.record_events()
+        self._boards[board.id] = board
+
+    def get(self, board_id: UUID, changes: bool = False) -> Board:
+        """
+        Retrieves a board by ID or will throw an HTTP exception if it doesn't exist.
+
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to retrieve
+
+        changes : bool
+            Whether the changes of the board will be asked for, see ``Board.changed_rows``. Boards in memory track
+            their own changes, so this is only used by ``state.SQLiteBoardRegistry``
+
+        Returns
+        -------
+        board : Board
+            Board if it is outstanding
+        """
+        if board := self._boards.get(board_id):
+            return board
+
+        raise HTTPException(
+            status_code=400,
+            detail="Board not found!"
+        )
+
+    def remove(self, board_id: UUID) -> Board:
+        """
+        Removes a board by ID or will throw an HTTP exception if it doesn't exist.
+
+        Parameters
+        ----------
+        board_id : UUID
+            ID of the board to remove
+
+        Returns
+        -------
+        board : Board
+            Board that was removed
+        """
+        board = self.get(board_id)
+        del self._boards[board_id]
+        return board
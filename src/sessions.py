@@ -0,0 +1,121 @@
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+
+from registry import BoardRegistry
+
+
+class Session:
+    """
+    Score and outstanding boards of a single player
+    """
+
+    def __init__(self, max_boards: int, record_events: bool = False):
+        """
+        Parameters
+        ----------
+        max_boards : int
+            Maximum number of outstanding boards the player can have
+
+        record_events : bool
+            Whether boards record their hits/flags, see ``BoardRegistry``
+        """
+        self.score = 0
+        self.boards = BoardRegistry(max_boards=max_boards, record_events=record_events)
+        self.last_seen = time.monotonic()
+
+
+class SessionRegistry:
+    """
+    Sessions by key. Requests without a session key share the default session, which is never evicted. Sessions are
+    kept in order of when they were last used, so idle sessions can be evicted from the front.
+    """
+
+    def __init__(self, max_boards: int, idle_timeout: float, max_sessions: int, record_events: bool = False):
+        """
+        Parameters
+        ----------
+        max_boards : int
+            Maximum number of outstanding boards for each session
+
+        idle_timeout : float
+            Seconds a session can go unused before it is evicted along with its boards
+
+        max_sessions : int
+            Maximum number of sessions, not counting the default session
+
+        record_events : bool
+            Whether boards record their hits/flags, see ``BoardRegistry``
+        """
+        self.max_boards = max_boards
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.record_events = record_events
+
+        self.default = Session(max_boards=max_boards, record_events=record_events)
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __iter__(self):
+        yield self.default
+        yield from self._sessions.values()
+
+    def items(self):
+        """
+        Returns
+        -------
+        Generator of the key and session of every session, the key of the default session is None
+        """
+        yield None, self.default
+        yield from self._sessions.items()
+
+    def get(self, key: str | None) -> Session:
+        """
+        Retrieves a session by key, starting a new one if it doesn't exist. Will throw an HTTP exception if there are
+        already ``max_sessions`` sessions.
+
+        Parameters
+        ----------
+        key : str | None
+            Session key, or None for the default session
+
+        Returns
+        -------
+        session : Session
+            Session for the key
+        """
+        now = time.monotonic()
+        self.evict_idle(now)
+
+        if key is None:
+            session = self.default
+        elif session := self._sessions.get(key):
+            self._sessions.move_to_end(key)
+        elif len(self._sessions) >= self.max_sessions:
+            raise HTTPException(
+                status_code=400,
+                detail="Cannot start another session until an idle session is evicted!"
+            )
+        else:
+            session = self._sessions[key] = Session(max_boards=self.max_boards, record_events=self.record_events)
+
+        session.last_seen = now
+        return session
+
+    def evict_idle(self, now: float) -> None:
+        """
+        Evicts every session that has not been used for ``idle_timeout`` seconds.
+
+        Parameters
+        ----------
+        now : float
+            Current ``time.monotonic`` time
+        """
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.last_seen < self.idle_timeout:
+                break
+            del self._sessions[key]
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseSettings, BaseModel, validator, ValidationError, NonNegativeInt
 
 
@@ -15,6 +17,25 @@ class AppSettings(BaseModel):
     Global app settings
     """
     max_boards: int = 5  # Maximum number of outstanding boards to allow
+    board_pool_size: int = 0  # Number of boards to generate ahead of time for /board, 0 disables the pool
+    board_pool_workers: int = 1  # Number of boards generated for the board pool at once, needs offload_executor
+    session_idle_timeout: int = 600  # Seconds a session can go unused before it is evicted along with its boards
+    max_sessions: int = 10000  # Maximum number of sessions, not counting the default session
+    metrics: bool = True  # Whether to time requests for /metrics
+    state_backend: Literal["memory", "sqlite"] = "memory"  # Where sessions/boards are kept, sqlite allows workers
+    state_path: str = "minesweeper.db"  # Database file of the sqlite state backend
+    state_cache_size: int = 1000  # Boards each worker of the sqlite state backend keeps loaded between requests
+    snapshot_path: str | None = None  # Journal file to save the memory state backend to, None disables snapshots
+    snapshot_interval: float = 1.0  # Seconds between saves to the journal
+    latency_enabled: bool = True  # Whether to add the latency of LatencySettings at all, can be turned off to benchmark
+    latency_seed: int | None = None  # Seed for the latency jitter, to make it reproducible
+    coalesce_window: float = 0  # Seconds to gather hits/flags on a board before applying them together, 0 disables
+    offload_executor: Literal["none", "thread", "process"] = "none"  # Pool to generate large boards in, off the loop
+    offload_workers: int = 1  # Number of threads/processes of the offload pool
+    offload_min_area: int = 250_000  # Number of spaces a board needs to be generated in the offload pool
+    max_reveal: int = 1000  # Most spaces a single /reveal hits, the rest of the area needs another /reveal
+    ws_max_in_flight: int = 100  # Messages of a /ws connection to handle at once, the rest wait to be read
+    trace_path: str | None = None  # File to trace every HTTP request to for benchmarks/replay.py, None disables
 
 
 LatencyValue = tuple[NonNegativeInt, NonNegativeInt] | NonNegativeInt  # Either a range (20 - 50)ms or a number 50ms
@@ -30,8 +51,20 @@ class LatencySettings(BaseModel):
     batch_hit: LatencyValue = 30, 60  # for the /batch_hit endpoint
     check: LatencyValue = 10, 20  # for the /check endpoint
     flag: LatencyValue = 10, 20  # for the /flag endpoint
+    actions: LatencyValue = 20, 40  # for the /actions endpoint, scaled by the square root of the # of actions
+    boards: LatencyValue = 10, 20  # for the /boards endpoint, scaled by the square root of the # of boards
+    check_many: LatencyValue = 10, 20  # for the /check_many endpoint, scaled by the square root of the # of boards
+    reveal: LatencyValue = 1, 2  # for the /reveal endpoint, for every space revealed
+    count_unhit_safe: LatencyValue = 10, 20  # for the /count_unhit_safe endpoint
+    is_space_blank: LatencyValue = 20, 40  # for the /is_space_blank endpoint
+    mines_in_region: LatencyValue = 40, 80  # for the /mines_in_region endpoint
+    is_space_a_mine: LatencyValue = 80, 160  # for the /is_space_a_mine endpoint
+    region: LatencyValue = 60, 120  # for the /region endpoint
+    state: LatencyValue = 10, 20  # for the /board/{board_id}/state endpoint
 
-    @validator("board", "score", "hit", "is_space_blank", "check", "flag", pre=True)
+    @validator("board", "score", "hit", "batch_hit", "check", "flag", "actions", "boards", "check_many", "reveal",
+               "count_unhit_safe", "is_space_blank", "mines_in_region", "is_space_a_mine", "region", "state",
+               pre=True)
     def _format_all_latency_values(cls, value: str | tuple[int, int] | int) -> LatencyValue:
         """
         Converts latency values from settings to proper format.
@@ -0,0 +1,288 @@
+import os
+import struct
+import threading
+from array import array
+from enum import IntEnum
+from typing import BinaryIO
+from uuid import UUID
+
+from models import Board
+from sessions import SessionRegistry
+from settings import BoardSettings
+
+
+class RecordType(IntEnum):
+    SCORE = 1  # Payload: score
+    LAYOUT = 2  # Payload: board ID, length, height, mines. The layout itself is regenerated from the ID
+    HISTORY = 3  # Payload: board ID, number of events, then the events
+    CHECKED = 4  # Payload: board ID
+    EVICTED = 5  # No payload
+
+
+# Every record starts with its type and the session key, followed by the payload of the type
+RECORD_HEADER = struct.Struct("<BH")
+SCORE_RECORD = struct.Struct("<d")
+LAYOUT_RECORD = struct.Struct("<16sIII")
+HISTORY_RECORD = struct.Struct("<16sI")
+CHECKED_RECORD = struct.Struct("<16s")
+EVENT = struct.Struct("<I")
+
+DEFAULT_SESSION = ""  # Key of the default session in the journal
+
+# Scores of the sessions, and the session, settings and every hit/flag of the outstanding boards, see ``Journal._fold``
+JournalState = tuple[dict[str, float], dict[UUID, tuple[str, BoardSettings, array]]]
+
+
+class Journal:
+    """
+    Append-only log of the sessions and outstanding boards, so they survive a restart. Layouts are never written, since
+    ``Board.new`` regenerates the same layout from the ID of a board, only the hits/flags on each board are. The boards
+    record their hits/flags from when they are given out (see ``SessionRegistry``), and every ``save`` appends and drops
+    the ones recorded since the last save, along with what else changed. Once the log grows to ``compact_ratio`` times
+    the size of the last snapshot, it is rewritten as a snapshot, replaying the log itself: one layout and history for
+    every outstanding board and one score for every session. Saving is split into ``collect``, which reads the sessions
+    and has to run on the event loop, and ``flush``, which writes to disk and can run on another thread.
+    """
+
+    def __init__(self, path: str, compact_ratio: float = 4):
+        """
+        Parameters
+        ----------
+        path : str
+            File to write the log to
+
+        compact_ratio : float
+            Log size, relative to the last snapshot, that triggers another snapshot
+        """
+        self.path = path
+        self.compact_ratio = compact_ratio
+
+        self._file: BinaryIO | None = None
+        self._snapshot_size = 0
+        self._scores: dict[str, float] = {}  # Score of every session as of the last save
+        self._saved: dict[UUID, str] = {}  # Session of every saved board
+        self._pending = bytearray()  # Records collected but not flushed yet, in order
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def restore(self, sessions: SessionRegistry) -> None:
+        """
+        Replays the log into empty sessions, then starts a new snapshot.
+
+        Parameters
+        ----------
+        sessions : SessionRegistry
+            Sessions to restore into, which record the hits/flags of their boards
+        """
+        data = b""
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                data = f.read()
+        scores, boards = self._fold(self._records(data))
+
+        for key, score in scores.items():
+            sessions.get(key or None).score = score
+        for board_id, (key, settings, events) in boards.items():
+            board = Board.new(settings, board_id=board_id)
+            board.replay(events)
+            sessions.get(key or None).boards.add(board)
+
+        self._scores = dict(scores)
+        self._saved = {board_id: key for board_id, (key, _, _) in boards.items()}
+        self._rewrite((scores, boards))
+
+    @staticmethod
+    def _records(data: bytes):
+        """
+        Parses the records of a log, stopping at a record that was only partly written.
+
+        Returns
+        -------
+        Generator of the type, session key, board ID (None for scores) and parsed payload of every record
+        """
+        offset = 0
+        try:
+            while offset < len(data):
+                type_, key_length = RECORD_HEADER.unpack_from(data, offset)
+                offset += RECORD_HEADER.size
+                if offset + key_length > len(data):
+                    return
+                key = data[offset:offset + key_length].decode()
+                offset += key_length
+
+                match type_:
+                    case RecordType.SCORE:
+                        record = (type_, key, None, SCORE_RECORD.unpack_from(data, offset)[0])
+                        offset += SCORE_RECORD.size
+                    case RecordType.LAYOUT:
+                        board_id, length, height, mines = LAYOUT_RECORD.unpack_from(data, offset)
+                        settings = BoardSettings(length=length, height=height, mines=mines)
+                        record = (type_, key, UUID(bytes=board_id), settings)
+                        offset += LAYOUT_RECORD.size
+                    case RecordType.HISTORY:
+                        board_id, count = HISTORY_RECORD.unpack_from(data, offset)
+                        offset += HISTORY_RECORD.size
+                        end = offset + count * EVENT.size
+                        if end > len(data):
+                            return
+                        events = [event for event, in EVENT.iter_unpack(data[offset:end])]
+                        record = (type_, key, UUID(bytes=board_id), events)
+                        offset = end
+                    case RecordType.CHECKED:
+                        record = (type_, key, UUID(bytes=CHECKED_RECORD.unpack_from(data, offset)[0]), None)
+                        offset += CHECKED_RECORD.size
+                    case RecordType.EVICTED:
+                        record = (type_, key, None, None)
+                    case _:
+                        return
+                yield record
+        except (struct.error, UnicodeDecodeError):
+            return
+
+    @staticmethod
+    def _fold(records) -> JournalState:
+        """
+        Plays the records of a log in order.
+
+        Returns
+        -------
+        scores, boards : JournalState
+            Score of every session, and the session, settings and every hit/flag of every outstanding board
+        """
+        scores: dict[str, float] = {}
+        boards: dict[UUID, tuple[str, BoardSettings, array]] = {}
+        for type_, key, board_id, payload in records:
+            match type_:
+                case RecordType.SCORE:
+                    scores[key] = payload
+                case RecordType.LAYOUT:
+                    boards[board_id] = (key, payload, array("I"))
+                case RecordType.HISTORY:
+                    if board_id in boards:
+                        boards[board_id][2].extend(payload)
+                case RecordType.CHECKED:
+                    boards.pop(board_id, None)
+                case RecordType.EVICTED:
+                    scores.pop(key, None)
+        return scores, boards
+
+    def save(self, sessions: SessionRegistry) -> None:
+        """
+        Appends every change since the last save to the log and waits for it to be on disk, see ``collect``.
+
+        Parameters
+        ----------
+        sessions : SessionRegistry
+            Sessions to save, which record the hits/flags of their boards
+        """
+        self.collect(sessions)
+        self.flush()
+
+    def collect(self, sessions: SessionRegistry) -> None:
+        """
+        Collects every change since the last save, to be appended to the log by ``flush``: new boards, new hits/flags,
+        checked boards and new scores.
+
+        Parameters
+        ----------
+        sessions : SessionRegistry
+            Sessions to save, which record the hits/flags of their boards
+        """
+        records = bytearray()
+        keys, outstanding = set(), set()
+        for key, session in sessions.items():
+            key = DEFAULT_SESSION if key is None else key
+            keys.add(key)
+            if self._scores.get(key) != session.score:
+                records += self._score_record(key, session.score)
+                self._scores[key] = session.score
+
+            for board in session.boards:
+                outstanding.add(board.id)
+                if board.id not in self._saved:
+                    records += self._layout_record(key, board.id, board.settings)
+                    self._saved[board.id] = key
+                if events := board.drain_events():
+                    records += self._history_record(key, board.id, events)
+
+        for board_id in self._saved.keys() - outstanding:
+            key = self._saved.pop(board_id)
+            records += self._header(RecordType.CHECKED, key) + CHECKED_RECORD.pack(board_id.bytes)
+        for key in self._scores.keys() - keys:
+            del self._scores[key]
+            records += self._header(RecordType.EVICTED, key)
+
+        with self._pending_lock:
+            self._pending += records
+
+    def flush(self) -> None:
+        """
+        Appends the collected changes to the log and waits for them to be on disk, rewriting the log as a snapshot if it
+        grew too large. Blocks, so the app runs it on the default executor.
+        """
+        with self._write_lock:
+            with self._pending_lock:
+                records, self._pending = self._pending, bytearray()
+            if records:
+                self._file.write(records)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            if self._file.tell() > self._snapshot_size * self.compact_ratio:
+                self._compact()
+
+    def _compact(self) -> None:
+        """
+        Rewrites the log as a snapshot of the state it holds.
+        """
+        with open(self.path, "rb") as f:
+            data = f.read()
+        self._rewrite(self._fold(self._records(data)))
+
+    def _rewrite(self, state: JournalState) -> None:
+        """
+        Writes a state as a new log, replacing the old log once the new one is on disk.
+        """
+        scores, boards = state
+        records = bytearray()
+        for key, score in scores.items():
+            records += self._score_record(key, score)
+        for board_id, (key, settings, events) in boards.items():
+            records += self._layout_record(key, board_id, settings)
+            if events:
+                records += self._history_record(key, board_id, events)
+
+        if self._file:
+            self._file.close()
+        with open(self.path + ".tmp", "wb") as f:
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.path + ".tmp", self.path)
+
+        self._file = open(self.path, "ab")
+        self._snapshot_size = max(len(records), 4096)
+
+    def close(self) -> None:
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    @staticmethod
+    def _header(type_: RecordType, key: str) -> bytes:
+        key = key.encode()
+        return RECORD_HEADER.pack(type_, len(key)) + key
+
+    def _score_record(self, key: str, score: float) -> bytes:
+        return self._header(RecordType.SCORE, key) + SCORE_RECORD.pack(score)
+
+    def _layout_record(self, key: str, board_id: UUID, settings: BoardSettings) -> bytes:
+        return self._header(RecordType.LAYOUT, key) + LAYOUT_RECORD.pack(
+            board_id.bytes, settings.length, settings.height, settings.mines
+        )
+
+    def _history_record(self, key: str, board_id: UUID, events: array) -> bytes:
+        return (
+            self._header(RecordType.HISTORY, key)
+            + HISTORY_RECORD.pack(board_id.bytes, len(events))
+            + struct.pack(f"<{len(events)}I", *events)
+        )
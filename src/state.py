@@ -0,0 +1,417 @@
+import asyncio
+import sqlite3
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator
+from uuid import UUID
+
+from fastapi import HTTPException
+
+from models import Board
+from sessions import Session, SessionRegistry
+from settings import AppSettings, BoardSettings
+from snapshots import Journal
+
+DEFAULT_SESSION = ""  # Key of the default session in the database
+
+
+class MemoryState:
+    """
+    Keeps every session in the memory of this process. Fastest, but only works with a single worker. Can be saved to a
+    ``snapshots.Journal`` to survive a restart.
+    """
+
+    def __init__(self, app_settings: AppSettings):
+        """
+        Parameters
+        ----------
+        app_settings : AppSettings
+            Board quota, session limits and the path of the journal
+        """
+        self.sessions = SessionRegistry(
+            max_boards=app_settings.max_boards,
+            idle_timeout=app_settings.session_idle_timeout,
+            max_sessions=app_settings.max_sessions,
+            record_events=bool(app_settings.snapshot_path)
+        )
+        self.journal = Journal(app_settings.snapshot_path) if app_settings.snapshot_path else None
+
+    @contextmanager
+    def session(self, key: str | None, write: bool = True) -> Iterator[Session]:
+        """
+        Parameters
+        ----------
+        key : str | None
+            Session key, or None for the default session
+
+        write : bool
+            Whether the session or its boards will be changed, only used by ``SQLiteState``
+
+        Returns
+        -------
+        session : Iterator[Session]
+            Session to read/update within the ``with`` block
+        """
+        yield self.sessions.get(key)
+
+    def outstanding_boards(self) -> int:
+        """
+        Returns
+        -------
+        count : int
+            Number of outstanding boards across all sessions
+        """
+        return sum(len(session.boards) for session in self.sessions)
+
+    def session_count(self) -> int:
+        """
+        Returns
+        -------
+        count : int
+            Number of sessions, including the default session
+        """
+        return len(self.sessions) + 1
+
+    def start(self) -> None:
+        """
+        Restores the sessions from the journal, if there is one
+        """
+        if self.journal:
+            self.journal.restore(self.sessions)
+
+    async def save(self) -> None:
+        """
+        Saves every change since the last save to the journal, if there is one. The changes are collected on the event
+        loop, and written to disk on the default executor so the loop is not blocked on the disk.
+        """
+        if self.journal:
+            self.journal.collect(self.sessions)
+            await asyncio.get_running_loop().run_in_executor(None, self.journal.flush)
+
+    def close(self) -> None:
+        if self.journal:
+            self.journal.save(self.sessions)
+            self.journal.close()
+
+
+class SQLiteBoardRegistry:
+    """
+    Outstanding boards of a session in the database, with the same interface as ``registry.BoardRegistry``. Only the
+    settings and version of a board and the cells that were hit/flagged are stored, since ``Board.new`` regenerates the
+    layout from the ID. Boards are loaded when they are first retrieved, from the boards this worker already has loaded
+    if it has them, catching up with the cells other workers changed since. Every cell that changed is written back when
+    the transaction of the session is committed.
+    """
+
+    def __init__(self, connection: sqlite3.Connection, session_key: str, max_boards: int, cache: OrderedDict):
+        self.max_boards = max_boards
+        self._connection = connection
+        self._session_key = session_key
+        self._cache: OrderedDict[UUID, Board] = cache  # Boards of the worker as of the last transaction they were in
+        self._loaded: dict[UUID, Board] = {}
+
+    def __len__(self) -> int:
+        return self._connection.execute(
+            "SELECT COUNT(*) FROM boards WHERE session = ?", (self._session_key,)
+        ).fetchone()[0]
+
+    def __contains__(self, board_id: UUID) -> bool:
+        return board_id in self._loaded or self._connection.execute(
+            "SELECT 1 FROM boards WHERE id = ? AND session = ?", (board_id.bytes, self._session_key)
+        ).fetchone() is not None
+
+    @property
+    def is_full(self) -> bool:
+        return len(self) >= self.max_boards
+
+    @property
+    def available(self) -> int:
+        return max(self.max_boards - len(self), 0)
+
+    def add(self, board: Board) -> None:
+        settings = board.settings
+        self._connection.execute(
+            "INSERT INTO boards (id, session, length, height, mines, version) VALUES (?, ?, ?, ?, ?, ?)",
+            (board.id.bytes, self._session_key, settings.length, settings.height, settings.mines, board.version)
+        )
+        board.record_events()
+        self._loaded[board.id] = board
+
+    def get(self, board_id: UUID, changes: bool = False) -> Board:
+        if board := self._loaded.get(board_id):
+            return board
+
+        row = self._connection.execute(
+            "SELECT length, height, mines, version FROM boards WHERE id = ? AND session = ?",
+            (board_id.bytes, self._session_key)
+        ).fetchone()
+        board = self._cache.pop(board_id, None)
+        if not row:
+            raise HTTPException(
+                status_code=400,
+                detail="Board not found!"
+            )
+
+        length, height, mines, version = row
+        if board is None:
+            board = Board.new(BoardSettings(length=length, height=height, mines=mines), board_id=board_id)
+        if board.version != version:
+            board.apply_cells(
+                self._connection.execute(
+                    "SELECT idx, bits, version FROM cells WHERE board = ? AND version > ?",
+                    (board_id.bytes, board.version)
+                ),
+                version
+            )
+        if changes:
+            board.track_changes(
+                self._connection.execute("SELECT idx, version FROM cells WHERE board = ?", (board_id.bytes,))
+            )
+        board.record_events()
+        self._loaded[board_id] = board
+        return board
+
+    def remove(self, board_id: UUID) -> Board:
+        board = self.get(board_id)
+        self._connection.execute("DELETE FROM boards WHERE id = ?", (board_id.bytes,))
+        self._connection.execute("DELETE FROM cells WHERE board = ?", (board_id.bytes,))
+        del self._loaded[board_id]
+        return board
+
+    def save(self) -> None:
+        """
+        Writes the cells that were hit/flagged in this transaction back to the database, along with the new version of
+        their boards. Boards that were only read are left alone.
+        """
+        for board_id, board in self._loaded.items():
+            if not (cells := board.drain_changed_cells()):
+                continue
+
+            self._connection.execute("UPDATE boards SET version = ? WHERE id = ?", (board.version, board_id.bytes))
+            self._connection.executemany(
+                """
+                INSERT INTO cells (board, idx, bits, version) VALUES (?, ?, ?, ?)
+                ON CONFLICT (board, idx) DO UPDATE SET bits = excluded.bits, version = excluded.version
+                """,
+                [(board_id.bytes, index, bits, version) for index, bits, version in cells]
+            )
+
+    def keep_loaded(self, cache_size: int) -> None:
+        """
+        Keeps the boards of a committed transaction loaded for the next transactions of the worker, dropping the boards
+        that were used least recently past ``cache_size`` boards. Boards of a transaction that was rolled back are not
+        kept, since they have changes that are not in the database.
+        """
+        self._cache.update(self._loaded)
+        while len(self._cache) > cache_size:
+            self._cache.popitem(last=False)
+
+
+class SQLiteSession:
+    """
+    A session in the database, with the same interface as ``sessions.Session``
+    """
+
+    def __init__(self, connection: sqlite3.Connection, key: str, score: float, max_boards: int, cache: OrderedDict):
+        self.key = key
+        self.score = score
+        self.boards = SQLiteBoardRegistry(connection, key, max_boards, cache)
+
+
+class SQLiteState:
+    """
+    Keeps every session in a SQLite database, so several worker processes can serve the same sessions and boards. Every
+    ``session`` block is a single write transaction, so hits/flags/checks are atomic across workers, or a read
+    transaction for requests that only read, which the workers can run at the same time.
+    """
+
+    def __init__(self, app_settings: AppSettings):
+        """
+        Parameters
+        ----------
+        app_settings : AppSettings
+            Board quota, session limits and the path of the database
+        """
+        self.max_boards = app_settings.max_boards
+        self.idle_timeout = app_settings.session_idle_timeout
+        self.max_sessions = app_settings.max_sessions
+        self.cache_size = app_settings.state_cache_size
+        self.path = app_settings.state_path
+
+        self._cache: OrderedDict[UUID, Board] = OrderedDict()  # Boards the worker has loaded, least recently used first
+        self._connection: sqlite3.Connection | None = None
+
+    def start(self) -> None:
+        """
+        Opens the database, creating its tables if needed. Every transaction is already on disk, so there is nothing to
+        restore. Called from the startup of the app, so the connection is opened in the worker process that uses it and
+        after the offload pool forked its processes.
+        """
+        # Only used from the event loop, but the loop of the app may not run on the thread that imported this module
+        self._connection = sqlite3.connect(self.path, isolation_level=None, timeout=30, check_same_thread=False)
+        self._connection.executescript("""
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS sessions (
+                key TEXT PRIMARY KEY,
+                score REAL NOT NULL,
+                last_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS sessions_last_seen ON sessions (last_seen);
+            CREATE TABLE IF NOT EXISTS boards (
+                id BLOB PRIMARY KEY,
+                session TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                mines INTEGER NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS boards_session ON boards (session);
+            CREATE TABLE IF NOT EXISTS cells (
+                board BLOB NOT NULL,
+                idx INTEGER NOT NULL,
+                bits INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                PRIMARY KEY (board, idx)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS cells_version ON cells (board, version);
+        """)
+
+    @contextmanager
+    def session(self, key: str | None, write: bool = True) -> Iterator[SQLiteSession]:
+        """
+        Opens a transaction on a session, starting the session if it doesn't exist. Changes are committed when the
+        ``with`` block exits, or rolled back if it raises.
+
+        Parameters
+        ----------
+        key : str | None
+            Session key, or None for the default session
+
+        write : bool
+            Whether the session or its boards will be changed. Without it, the session is only read in a transaction
+            that does not block the other workers, and nothing is written back, unless the session has to be started
+            or its last use has to be updated
+
+        Returns
+        -------
+        session : Iterator[SQLiteSession]
+            Session to read/update within the ``with`` block
+        """
+        key = DEFAULT_SESSION if key is None else key
+        now = time.time()
+
+        session = None if write else self._open_to_read(key, now)
+        if session is None:
+            write = True
+            self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            session = session or self._open(key, now)
+            yield session
+            if write:
+                session.boards.save()
+                self._connection.execute(
+                    "UPDATE sessions SET score = ?, last_seen = ? WHERE key = ?", (session.score, now, key)
+                )
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        self._connection.execute("COMMIT")
+        session.boards.keep_loaded(self.cache_size)
+
+    def _open_to_read(self, key: str, now: float) -> SQLiteSession | None:
+        """
+        Loads a session in a read transaction. Returns None without a transaction if the session doesn't exist yet, or
+        if it was last used more than a tenth of ``idle_timeout`` ago, so reading a session keeps it from being evicted.
+        """
+        self._connection.execute("BEGIN")
+        try:
+            row = self._connection.execute("SELECT score, last_seen FROM sessions WHERE key = ?", (key,)).fetchone()
+        except BaseException:
+            self._connection.execute("ROLLBACK")
+            raise
+        if row and now - row[1] < self.idle_timeout / 10:
+            return SQLiteSession(self._connection, key, row[0], self.max_boards, self._cache)
+
+        self._connection.execute("COMMIT")
+        return None
+
+    def _open(self, key: str, now: float) -> SQLiteSession:
+        """
+        Loads a session, evicting idle sessions before starting a new one.
+        """
+        if row := self._connection.execute("SELECT score FROM sessions WHERE key = ?", (key,)).fetchone():
+            return SQLiteSession(self._connection, key, row[0], self.max_boards, self._cache)
+
+        self._evict_idle(now)
+        sessions = self._connection.execute(
+            "SELECT COUNT(*) FROM sessions WHERE key != ?", (DEFAULT_SESSION,)
+        ).fetchone()[0]
+        if key != DEFAULT_SESSION and sessions >= self.max_sessions:
+            raise HTTPException(
+                status_code=400,
+                detail="Cannot start another session until an idle session is evicted!"
+            )
+
+        self._connection.execute("INSERT INTO sessions (key, score, last_seen) VALUES (?, 0, ?)", (key, now))
+        return SQLiteSession(self._connection, key, 0, self.max_boards, self._cache)
+
+    def _evict_idle(self, now: float) -> None:
+        """
+        Deletes every session, and its boards, that has not been used for ``idle_timeout`` seconds.
+        """
+        cutoff = now - self.idle_timeout
+        self._connection.execute(
+            """
+            DELETE FROM cells WHERE board IN (
+                SELECT id FROM boards WHERE session IN (SELECT key FROM sessions WHERE last_seen < ? AND key != ?)
+            )
+            """,
+            (cutoff, DEFAULT_SESSION)
+        )
+        self._connection.execute(
+            "DELETE FROM boards WHERE session IN (SELECT key FROM sessions WHERE last_seen < ? AND key != ?)",
+            (cutoff, DEFAULT_SESSION)
+        )
+        self._connection.execute(
+            "DELETE FROM sessions WHERE last_seen < ? AND key != ?", (cutoff, DEFAULT_SESSION)
+        )
+
+    def outstanding_boards(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM boards").fetchone()[0]
+
+    def session_count(self) -> int:
+        sessions = self._connection.execute(
+            "SELECT COUNT(*) FROM sessions WHERE key != ?", (DEFAULT_SESSION,)
+        ).fetchone()[0]
+        return sessions + 1
+
+    async def save(self) -> None:
+        pass
+
+    def close(self) -> None:
+        if self._connection:
+            self._connection.close()
+            self._connection = None
+
+
+def new_state(app_settings: AppSettings) -> MemoryState | SQLiteState:
+    """
+    Parameters
+    ----------
+    app_settings : AppSettings
+        App settings, ``state_backend`` picks the backend
+
+    Returns
+    -------
+    state : MemoryState | SQLiteState
+        State backend
+    """
+    match app_settings.state_backend:
+        case "memory":
+            return MemoryState(app_settings)
+        case "sqlite":
+            return SQLiteState(app_settings)
+        case _:
+            raise ValueError(f"Unknown state backend: {app_settings.state_backend}")
@@ -0,0 +1,188 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Any, Iterable
+from urllib.parse import parse_qs
+from uuid import UUID
+
+import orjson
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from metrics import measure_injected_latency, route
+
+# IDs of the boards given out by the current request, so a replay can map them to the IDs of the replayed boards
+_new_boards: ContextVar[list[str] | None] = ContextVar("new_boards", default=None)
+
+
+def record_new_boards(board_ids: Iterable[UUID]) -> None:
+    """
+    Adds boards to the boards given out by the current request. Does nothing outside a request that is being traced.
+
+    Parameters
+    ----------
+    board_ids : Iterable[UUID]
+        IDs of the boards given out
+    """
+    if (new_boards := _new_boards.get()) is not None:
+        new_boards.extend(str(board_id) for board_id in board_ids)
+
+
+class Tracer:
+    """
+    Appends a line of JSON for every HTTP request to a file, for ``benchmarks/replay.py`` to re-drive. Lines are
+    buffered and written out together, a whole number of lines at a time, so several workers can share a file.
+
+    The first line written by every run holds the settings of the run, like ``{"settings": {...}}``. Every other line
+    is a request:
+
+    - time: arrival time, in seconds since the epoch
+    - session: ``X-Session`` header, or null
+    - accept: ``Accept`` header, or null
+    - method, endpoint (route), path, query and body (text) of the request
+    - board_id: ``board_id`` query parameter, or null
+    - boards: IDs of the boards the request gave out, only for requests that gave out boards
+    - status: status code of the response
+    - injected, compute: seconds spent sleeping in ``helpers.wait_for`` and the rest of the seconds of the request
+    """
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16, flush_interval: float = 1.0):
+        """
+        Parameters
+        ----------
+        path : str
+            File to append the trace to
+
+        buffer_size : int
+            Bytes of lines to hold before writing them out
+
+        flush_interval : float
+            Seconds after which lines are written out even if the buffer is not full
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+
+        self._fd: int | None = None
+        self._buffer = bytearray()
+        self._flushed_at = 0.0
+
+    def start(self, settings: dict[str, Any]) -> None:
+        """
+        Opens the trace and records the settings of this run.
+
+        Parameters
+        ----------
+        settings : dict[str, Any]
+            Settings of the app
+        """
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._flushed_at = time.monotonic()
+        self.record({"settings": settings})
+        self.flush()
+
+    def record(self, entry: dict[str, Any]) -> None:
+        """
+        Buffers a line of the trace, writing out the buffer if it is full or old enough.
+
+        Parameters
+        ----------
+        entry : dict[str, Any]
+            Line to add
+        """
+        if self._fd is None:
+            return
+
+        self._buffer += orjson.dumps(entry) + b"\n"
+        if len(self._buffer) >= self.buffer_size or time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Writes out the buffered lines in a single write
+        """
+        if self._buffer and self._fd is not None:
+            os.write(self._fd, self._buffer)
+            self._buffer.clear()
+        self._flushed_at = time.monotonic()
+
+    def close(self) -> None:
+        if self._fd is not None:
+            self.flush()
+            os.close(self._fd)
+            self._fd = None
+
+
+class TraceMiddleware:
+    """
+    ASGI middleware that records every HTTP request into a ``Tracer``
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        arrival = time.time()
+        body = bytearray()
+        status = [500]  # Stays an error if the app fails before it responds
+
+        async def receive_body() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                body.extend(message.get("body", b""))
+            return message
+
+        async def send_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        new_boards = []
+        token = _new_boards.set(new_boards)
+        with measure_injected_latency() as injected:
+            start = time.perf_counter()
+            try:
+                await self.app(scope, receive_body, send_status)
+            finally:
+                total = time.perf_counter() - start
+                _new_boards.reset(token)
+                self.tracer.record(self._entry(scope, arrival, body, status[0], new_boards, injected[0], total))
+
+    @staticmethod
+    def _entry(
+        scope: Scope,
+        arrival: float,
+        body: bytes,
+        status: int,
+        new_boards: list[str],
+        injected: float,
+        total: float
+    ) -> dict[str, Any]:
+        """
+        Returns
+        -------
+        entry : dict[str, Any]
+            Line of the trace for a request, see ``Tracer``
+        """
+        headers = dict(scope["headers"])
+        query = scope["query_string"].decode()
+        entry = {
+            "time": arrival,
+            "session": headers[b"x-session"].decode() if b"x-session" in headers else None,
+            "accept": headers[b"accept"].decode() if b"accept" in headers else None,
+            "method": scope["method"],
+            "endpoint": route(scope),
+            "path": scope["path"],
+            "query": query,
+            "board_id": parse_qs(query).get("board_id", [None])[0],
+            "body": body.decode(errors="replace"),
+            "status": status,
+            "injected": injected,
+            "compute": max(total - injected, 0),
+        }
+        if new_boards:
+            entry["boards"] = new_boards
+        return entry
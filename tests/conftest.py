@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The app is run from src/, so its modules import each other by their bare names
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
@@ -0,0 +1,114 @@
+import asyncio
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from fastapi import HTTPException
+
+from dispatcher import Dispatcher
+from models import Action, ActionType, Board
+from settings import AppSettings, BoardSettings, LatencySettings
+from state import MemoryState
+
+SETTINGS = BoardSettings(length=9, height=9, mines=10)
+
+
+class CountingState(MemoryState):
+    """
+    Memory state that counts how many times a session is opened
+    """
+
+    def __init__(self):
+        super().__init__(AppSettings())
+        self.opened = 0
+
+    @contextmanager
+    def session(self, key: str | None, write: bool = True):
+        self.opened += 1
+        with super().session(key, write) as session:
+            yield session
+
+
+def new_dispatcher() -> tuple[Dispatcher, CountingState, Board]:
+    state = CountingState()
+    board = Board.new(SETTINGS)
+    state.sessions.get(None).boards.add(board)
+    return Dispatcher(state, LatencySettings(hit="0", flag="0"), window=0.01), state, board
+
+
+async def submit_all(dispatcher: Dispatcher, board_id: uuid.UUID, actions: list[Action]) -> list:
+    return await asyncio.gather(
+        *(dispatcher.submit(None, board_id, action) for action in actions), return_exceptions=True
+    )
+
+
+def test_coalesces_actions_on_a_board():
+    async def run():
+        dispatcher, state, board = new_dispatcher()
+        safe = [space for space in board if space.type != "MINE"]
+        actions = [
+            Action(type=ActionType.HIT, x=safe[0].x, y=safe[0].y),
+            Action(type=ActionType.FLAG, x=safe[1].x, y=safe[1].y),
+            Action(type=ActionType.HIT, x=safe[0].x, y=safe[0].y),  # Already hit by the first action
+            Action(type=ActionType.FLAG, x=safe[1].x, y=safe[1].y),  # Unflags the space again
+        ]
+        results = await submit_all(dispatcher, board.id, actions)
+        await dispatcher.stop()
+        return state, board, safe, results
+
+    state, board, safe, (hit, flagged, error, unflagged) = asyncio.run(run())
+    assert state.opened == 1  # Every action was applied in a single pass over the board
+    assert (hit.x, hit.y, hit.hit) == (safe[0].x, safe[0].y, True)
+    assert flagged.flagged and not unflagged.flagged
+    assert isinstance(error, HTTPException) and error.status_code == 400  # Only the failed action gets the error
+    assert board.version == 3
+
+
+def test_missing_board_fails_every_action():
+    async def run():
+        dispatcher, _, _ = new_dispatcher()
+        actions = [Action(type=ActionType.HIT, x=0, y=y) for y in range(3)]
+        results = await submit_all(dispatcher, uuid.uuid4(), actions)
+        await dispatcher.stop()
+        return results
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, HTTPException) and result.detail == "Board not found!" for result in results)
+
+
+def test_state_failure_fans_out(monkeypatch):
+    async def run():
+        dispatcher, state, board = new_dispatcher()
+
+        @contextmanager
+        def session(key, write=True):
+            raise RuntimeError("database is locked")
+            yield
+
+        monkeypatch.setattr(state, "session", session)
+        results = await submit_all(dispatcher, board.id, [Action(type=ActionType.FLAG, x=1, y=y) for y in range(3)])
+        await dispatcher.stop()
+        return board, results
+
+    board, results = asyncio.run(run())
+    assert [str(result) for result in results] == ["database is locked"] * 3
+    assert board.version == 0
+
+
+@pytest.mark.parametrize("window", [0, 0.01])
+def test_separate_boards_are_not_coalesced(window):
+    async def run():
+        dispatcher, state, board = new_dispatcher()
+        other = Board.new(SETTINGS)
+        state.sessions.get(None).boards.add(other)
+        dispatcher.window = window
+        await asyncio.gather(
+            dispatcher.submit(None, board.id, Action(type=ActionType.FLAG, x=0, y=0)),
+            dispatcher.submit(None, other.id, Action(type=ActionType.FLAG, x=0, y=0)),
+        )
+        await dispatcher.stop()
+        return state, board, other
+
+    state, board, other = asyncio.run(run())
+    assert state.opened == 2
+    assert board[0, 0].flagged and other[0, 0].flagged
@@ -0,0 +1,101 @@
+import orjson
+import pytest
+
+from encoding import (
+    FLAG_FAILED, FLAG_FLAGGED, FLAG_HIT, SPACE_RECORD, TYPE_CODES, UNKNOWN_VALUE, encode_action_results,
+    encode_cell_rows, encode_cells, encode_space, encode_spaces
+)
+from models import ActionResult, Board, BoardSpace, BoardSpaceType
+from settings import BoardSettings
+
+SETTINGS = BoardSettings(length=7, height=5, mines=6)
+TYPES = {code: type_ for type_, code in TYPE_CODES.items()}
+
+
+def decode(data: bytes) -> list[dict]:
+    """
+    Unpacks back-to-back binary records into the JSON form of the spaces
+    """
+    return [
+        {
+            "x": x,
+            "y": y,
+            "value": None if value == UNKNOWN_VALUE else value,
+            "type": TYPES[type_],
+            "hit": bool(flags & FLAG_HIT),
+            "flagged": bool(flags & FLAG_FLAGGED),
+        }
+        for x, y, value, type_, flags in SPACE_RECORD.iter_unpack(data)
+    ]
+
+
+def played_board() -> Board:
+    board = Board.new(SETTINGS)
+    for space in list(board):
+        if (space.x + space.y) % 3 == 0 and space.type != BoardSpaceType.MINE:
+            board.hit(space)
+        elif (space.x + space.y) % 3 == 1:
+            board.toggle_flag(space)
+    return board
+
+
+def given_out(space: BoardSpace) -> dict:
+    """
+    Returns
+    -------
+    space : dict
+        JSON form of a space, with the value and type only if it was hit
+    """
+    if not space.hit:
+        return {"x": space.x, "y": space.y, "value": None, "type": None, "hit": False, "flagged": space.flagged}
+    return {"x": space.x, "y": space.y, "value": space.value, "type": space.type, "hit": True, "flagged": False}
+
+
+@pytest.mark.parametrize("space", [
+    BoardSpace(x=0, y=0),
+    BoardSpace(x=3, y=-1, value=0, type=BoardSpaceType.BLANK, hit=True, flagged=False),
+    BoardSpace(x=2**31 - 1, y=4, value=8, type=BoardSpaceType.VALUE, hit=True, flagged=False),
+    BoardSpace(x=1, y=2, value=1, type=BoardSpaceType.MINE, hit=False, flagged=True),
+])
+def test_space_round_trip(space):
+    (decoded,) = decode(encode_space(space))
+    assert decoded == {**space.dict(), "hit": bool(space.hit), "flagged": bool(space.flagged)}
+
+
+def test_spaces_round_trip():
+    spaces = list(played_board())
+    assert decode(encode_spaces(spaces)) == [
+        {**space.dict(), "type": space.type, "hit": bool(space.hit), "flagged": bool(space.flagged)} for space in spaces
+    ]
+
+
+def test_failed_actions():
+    actions = [BoardSpace(x=1, y=1), BoardSpace(x=2, y=3)]
+    space = BoardSpace(x=1, y=1, value=2, type=BoardSpaceType.VALUE, hit=True, flagged=False)
+    results = [ActionResult(space=space), ActionResult(error="Space already hit!")]
+
+    data = encode_action_results(actions, results)
+    assert [flags for *_, flags in SPACE_RECORD.iter_unpack(data)] == [FLAG_HIT, FLAG_FAILED]
+    assert [(space["x"], space["y"]) for space in decode(data)] == [(1, 1), (2, 3)]
+
+
+@pytest.mark.parametrize("binary", [True, False])
+def test_cells_match_spaces(binary):
+    board = played_board()
+    indexes = [7, 0, 34, 12]
+    content = encode_cells(((index, board._cells[index]) for index in indexes), SETTINGS.height, binary)
+
+    spaces = decode(content) if binary else orjson.loads(content)
+    assert spaces == [given_out(board._space_at(index)) for index in indexes]
+
+
+@pytest.mark.parametrize("binary", [True, False])
+def test_cell_rows_match_spaces(binary):
+    board = played_board()
+    board.track_changes()
+    rows = list(encode_cell_rows(board.changed_rows(), binary))
+
+    spaces = []
+    for row in rows:
+        spaces += decode(row) if binary else orjson.loads(row)
+    assert spaces == [given_out(space) for space in board if space.hit or space.flagged]  # Only the touched spaces
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from fenwick import Fenwick2D
+from models import Board, Region
+from settings import BoardSettings
+
+
+def rectangles(rng: np.random.Generator, length: int, height: int, count: int):
+    for _ in range(count):
+        x0, x1 = sorted(rng.integers(length, size=2))
+        y0, y1 = sorted(rng.integers(height, size=2))
+        yield int(x0), int(y0), int(x1), int(y1)
+
+
+@pytest.mark.parametrize("length, height", [(1, 1), (1, 7), (8, 1), (13, 9), (16, 16)])
+def test_from_counts_matches_adds(length, height):
+    rng = np.random.default_rng(length * height)
+    counts = rng.integers(0, 5, size=(length, height))
+
+    added = Fenwick2D(length, height)
+    for (x, y), count in np.ndenumerate(counts):
+        added.add(x, y, int(count))
+    built = Fenwick2D.from_counts(counts)
+    assert built._tree == added._tree
+
+    for x0, y0, x1, y1 in rectangles(rng, length, height, 50):
+        assert built.sum(x0, y0, x1, y1) == counts[x0:x1 + 1, y0:y1 + 1].sum()
+
+
+def test_add_after_build():
+    rng = np.random.default_rng(0)
+    counts = rng.integers(0, 2, size=(11, 6))
+    tree = Fenwick2D.from_counts(counts)
+    for _ in range(100):
+        x, y, delta = int(rng.integers(11)), int(rng.integers(6)), int(rng.integers(-1, 2))
+        counts[x, y] += delta
+        tree.add(x, y, delta)
+        x0, y0, x1, y1 = next(rectangles(rng, 11, 6, 1))
+        assert tree.sum(x0, y0, x1, y1) == counts[x0:x1 + 1, y0:y1 + 1].sum()
+
+
+def test_region_stats_match_spaces():
+    settings = BoardSettings(length=19, height=12, mines=30)
+    board = Board.new(settings)
+    rng = np.random.default_rng(1)
+
+    def check():
+        for x0, y0, x1, y1 in rectangles(rng, settings.length, settings.height, 20):
+            region = Region(x=x0, y=y0, length=x1 - x0 + 1, height=y1 - y0 + 1)
+            spaces = [board[x, y] for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+            stats = board.region_stats(region)
+            assert stats.mines == board.mines_in_region(region) == sum(space.type == "MINE" for space in spaces)
+            assert stats.value == sum(space.value for space in spaces if space.type != "MINE")
+            assert stats.hits == sum(space.hit for space in spaces)
+            assert stats.flags == sum(bool(space.flagged) for space in spaces)
+
+    check()  # Builds the tables, which are then kept up to date by every hit/flag
+    for _ in range(80):
+        x, y = int(rng.integers(settings.length)), int(rng.integers(settings.height))
+        if board[x, y].hit:
+            continue
+        if rng.integers(2):
+            board.hit((x, y))
+        else:
+            board.toggle_flag((x, y))
+    check()
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+import models
+from models import Board, Region, SparseCells
+from settings import BoardSettings
+
+SETTINGS = BoardSettings(length=23, height=17, mines=40)
+
+
+def boards(monkeypatch) -> tuple[Board, Board]:
+    """
+    Returns
+    -------
+    dense, sparse : tuple[Board, Board]
+        The same board (same ID, so the same mines) with dense and with sparse cells
+    """
+    dense = Board.new(SETTINGS)
+    monkeypatch.setattr(models, "SPARSE_BOARD_AREA", 0)
+    sparse = Board.new(SETTINGS, board_id=dense.id)
+    assert isinstance(sparse._cells, SparseCells) and isinstance(dense._cells, bytearray)
+    return dense, sparse
+
+
+def regions(rng: random.Random, count: int) -> list[Region]:
+    regions = []
+    for _ in range(count):
+        x0, x1 = sorted(rng.randrange(SETTINGS.length) for _ in range(2))
+        y0, y1 = sorted(rng.randrange(SETTINGS.height) for _ in range(2))
+        regions.append(Region(x=x0, y=y0, length=x1 - x0 + 1, height=y1 - y0 + 1))
+    return regions
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sparse_matches_dense(monkeypatch, seed):
+    rng = random.Random(seed)
+    dense, sparse = boards(monkeypatch)
+    assert list(sparse) == list(dense)
+
+    for board in (dense, sparse):
+        board.track_changes()
+        board.record_events()
+    for _ in range(150):
+        x, y = rng.randrange(SETTINGS.length), rng.randrange(SETTINGS.height)
+        if dense[x, y].hit:
+            continue
+        match rng.randrange(3):
+            case 0:
+                assert sparse.hit((x, y)) == dense.hit((x, y))
+            case 1:
+                assert sparse.toggle_flag((x, y)) == dense.toggle_flag((x, y))
+            case 2:
+                assert sparse.reveal((x, y), limit=20) == dense.reveal((x, y), limit=20)
+
+    assert list(sparse) == list(dense)
+    assert (sparse.version, sparse.flags, sparse.score, sparse.is_correct) == (
+        dense.version, dense.flags, dense.score, dense.is_correct
+    )
+    assert sparse.unhit_safe_spaces == dense.unhit_safe_spaces
+    assert list(sparse.drain_events()) == list(dense.drain_events())
+    since = rng.randrange(dense.version + 1)
+    assert list(sparse.changed_rows(since)) == list(dense.changed_rows(since))
+
+    for region in regions(rng, 50):
+        assert sparse.mines_in_region(region) == dense.mines_in_region(region)
+        assert sparse.region_stats(region) == dense.region_stats(region)
+
+
+def test_sparse_packing(monkeypatch):
+    dense, sparse = boards(monkeypatch)
+    for x in range(SETTINGS.length):
+        space = dense[x, x % SETTINGS.height]
+        if space.type != "MINE":
+            dense.hit(space)
+            sparse.hit(space)
+        else:
+            dense.toggle_flag(space)
+            sparse.toggle_flag(space)
+
+    unpacked = Board.from_bytes(sparse.id, SETTINGS, sparse.to_bytes())
+    assert isinstance(unpacked._cells, SparseCells)
+    assert list(unpacked) == list(dense)
+    assert (unpacked.flags, unpacked.score) == (dense.flags, dense.score)
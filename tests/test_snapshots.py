@@ -0,0 +1,203 @@
+import struct
+
+import pytest
+
+from models import Board, BoardSpace
+from sessions import SessionRegistry
+from settings import BoardSettings
+from snapshots import RECORD_HEADER, Journal, RecordType
+
+SETTINGS = BoardSettings(length=9, height=9, mines=10)
+
+
+def new_sessions() -> SessionRegistry:
+    return SessionRegistry(max_boards=10, idle_timeout=600, max_sessions=10, record_events=True)
+
+
+def play(board: Board, hits: int, flags: int) -> None:
+    """
+    Hits the first ``hits`` safe spaces that are not hit yet and toggles the flag on the first ``flags`` spaces that are
+    not hit, in order of x then y
+    """
+    for space in list(board):
+        if space.hit:
+            continue
+        if flags:
+            board.toggle_flag(space)
+            flags -= 1
+        elif hits and space.type != "MINE":
+            board.hit(space)
+            hits -= 1
+
+
+def state(sessions: SessionRegistry) -> dict:
+    """
+    Returns
+    -------
+    state : dict
+        Score, and the version and packed state of every board, of every session
+    """
+    return {
+        key: (session.score, {board.id: (board.version, board.to_bytes()) for board in session.boards})
+        for key, session in sessions.items()
+    }
+
+
+def restored(path) -> SessionRegistry:
+    sessions = new_sessions()
+    journal = Journal(str(path))
+    journal.restore(sessions)
+    journal.close()
+    return sessions
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "journal.log"
+
+
+@pytest.fixture
+def journal(path):
+    journal = Journal(str(path))
+    journal.restore(new_sessions())
+    yield journal
+    journal.close()
+
+
+def test_round_trip(path, journal):
+    sessions = new_sessions()
+    sessions.get(None).score = 3
+    sessions.get("a").score = 1.5
+    for key in (None, "a"):
+        for _ in range(2):
+            board = Board.new(SETTINGS)
+            sessions.get(key).boards.add(board)
+            play(board, hits=5, flags=2)
+
+    journal.save(sessions)
+    assert state(restored(path)) == state(sessions)
+
+
+def test_incremental_saves(path, journal):
+    sessions = new_sessions()
+    board = Board.new(SETTINGS)
+    sessions.get("a").boards.add(board)
+    journal.save(sessions)
+
+    play(board, hits=3, flags=1)
+    journal.save(sessions)
+    play(board, hits=2, flags=0)
+    play(board, hits=0, flags=1)
+    play(board, hits=0, flags=1)  # Unflags the same space
+    sessions.get("a").score = 2
+    journal.save(sessions)
+
+    assert state(restored(path)) == state(sessions)
+    assert not board.drain_events()  # Every event was written and dropped
+
+
+def test_events_only_recorded_once_given_out():
+    board = Board.new(SETTINGS)
+    board.hit(BoardSpace(x=0, y=0))
+    assert not board.drain_events()
+
+    new_sessions().get("a").boards.add(board)
+    space = next(space for space in board if not space.hit)
+    board.toggle_flag(space)
+    assert list(board.drain_events()) == [(space.x * SETTINGS.height + space.y) << 1 | 1]
+    assert not board.drain_events()
+
+
+def test_checked_and_evicted(path, journal):
+    sessions = new_sessions()
+    sessions.get("a").score = 1
+    sessions.get("b").score = 2
+    kept, checked = Board.new(SETTINGS), Board.new(SETTINGS)
+    sessions.get("a").boards.add(kept)
+    sessions.get("a").boards.add(checked)
+    journal.save(sessions)
+
+    sessions.get("a").boards.remove(checked.id)
+    sessions.evict_idle(float("inf"))  # Evicts every session but the default one
+    sessions.get("a").boards.add(kept)
+    sessions.get("a").score = 1
+    journal.save(sessions)
+
+    sessions = restored(path)
+    assert [board.id for board in sessions.get("a").boards] == [kept.id]
+    assert "b" not in dict(sessions.items())
+
+
+def test_truncated_tail(path, journal):
+    sessions = new_sessions()
+    board = Board.new(SETTINGS)
+    sessions.get("a").boards.add(board)
+    journal.save(sessions)
+    saved = state(sessions)
+    size = path.stat().st_size
+
+    play(board, hits=4, flags=2)
+    sessions.get("a").score = 5
+    sessions.get("b").boards.add(Board.new(SETTINGS))
+    journal.save(sessions)
+    data = path.read_bytes()
+    records = list(Journal._records(data))
+
+    for end in range(len(data)):
+        # Every record that was fully written is read, and the partly written one is dropped
+        parsed = list(Journal._records(data[:end]))
+        assert parsed == records[:len(parsed)]
+
+        if end == size:
+            path.write_bytes(data[:end])
+            assert state(restored(path)) == saved
+
+
+def test_compaction(path):
+    journal = Journal(str(path), compact_ratio=1.01)
+    journal.restore(new_sessions())
+    sessions = new_sessions()
+    boards = [Board.new(SETTINGS) for _ in range(200)]  # Enough to be over the minimum snapshot
+    for board in boards:
+        sessions.get(None).boards.add(board)
+    journal.save(sessions)
+
+    sizes = []
+    for i in range(200):
+        boards[i % 20].toggle_flag(BoardSpace(x=i // 20 % 3, y=0))
+        journal.save(sessions)
+        sizes.append(path.stat().st_size)
+    journal.close()
+
+    assert any(after < before for before, after in zip(sizes, sizes[1:]))  # Rewritten as a snapshot at least once
+    assert state(restored(path)) == state(sessions)
+
+    # A snapshot has a single layout, and history if there is any, for every board
+    journal = Journal(str(path))
+    journal.restore(new_sessions())
+    journal.close()
+    types = [record[0] for record in Journal._records(path.read_bytes())]
+    assert types.count(RecordType.LAYOUT) == len(boards)
+    assert types.count(RecordType.HISTORY) == 20
+
+
+def test_stops_at_unknown_record():
+    data = RECORD_HEADER.pack(RecordType.EVICTED, 1) + b"a" + struct.pack("<BH", 0xFF, 0)
+    assert [record[:2] for record in Journal._records(data)] == [(RecordType.EVICTED, "a")]
+
+
+def test_flushes_collected_changes_in_order(path, journal):
+    size = path.stat().st_size
+    sessions = new_sessions()
+    board = Board.new(SETTINGS)
+    sessions.get("a").boards.add(board)
+    journal.collect(sessions)
+    play(board, hits=0, flags=1)
+    journal.collect(sessions)
+    play(board, hits=0, flags=1)  # Unflags the same space
+    play(board, hits=2, flags=0)
+    journal.collect(sessions)
+    assert path.stat().st_size == size  # Nothing is written until flushed
+
+    journal.flush()
+    assert state(restored(path)) == state(sessions)
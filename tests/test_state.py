@@ -0,0 +1,98 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from models import Board, BoardSpaceType
+from settings import AppSettings, BoardSettings
+from state import SQLiteState
+
+SETTINGS = BoardSettings(length=12, height=10, mines=15)
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """
+    Two workers on the same database, each with its own connection and loaded boards
+    """
+    path = str(tmp_path / "state.db")
+    app_settings = AppSettings(state_backend="sqlite", state_path=path, max_boards=3, max_sessions=2)
+    workers = [SQLiteState(app_settings), SQLiteState(app_settings)]
+    for worker in workers:
+        worker.start()
+    yield workers
+    for worker in workers:
+        worker.close()
+
+
+def safe_spaces(board: Board) -> list[tuple[int, int]]:
+    return [(space.x, space.y) for space in board if space.type != BoardSpaceType.MINE]
+
+
+def test_changes_since_version(workers):
+    first, second = workers
+    reference = Board.new(SETTINGS)
+    reference.track_changes()
+    with first.session("a") as session:
+        session.boards.add(Board.new(SETTINGS, board_id=reference.id))
+
+    spaces = safe_spaces(reference)
+    for i, worker in enumerate([first, second, first, first, second, second]):
+        with worker.session("a") as session:
+            board = session.boards.get(reference.id)
+            board.hit(spaces[i])
+            board.toggle_flag(spaces[-1 - i])
+        reference.hit(spaces[i])
+        reference.toggle_flag(spaces[-1 - i])
+
+    for since in range(reference.version + 1):
+        with first.session("a", write=False) as session:
+            board = session.boards.get(reference.id, changes=True)
+            assert board.version == reference.version
+            assert list(board.changed_rows(since)) == list(reference.changed_rows(since))
+
+
+def test_failed_transaction_is_rolled_back(workers):
+    first = workers[0]
+    boards = [Board.new(SETTINGS) for _ in range(2)]
+    with first.session("a") as session:
+        for board in boards:
+            session.boards.add(board)
+            board.hit(safe_spaces(board)[0])
+
+    # Like /check_many with a board that is not outstanding, after the other boards were already checked
+    with pytest.raises(HTTPException):
+        with first.session("a") as session:
+            session.boards.get(boards[0].id).hit(safe_spaces(boards[0])[1])
+            session.boards.remove(boards[1].id)
+            session.score += 10
+            session.boards.get(uuid.uuid4())
+
+    for worker in workers:
+        with worker.session("a", write=False) as session:
+            assert session.score == 0
+            assert [board.id in session.boards for board in boards] == [True, True]
+            # The worker that rolled back does not keep the hit that was never committed
+            assert session.boards.get(boards[0].id).version == 1
+
+
+def test_board_and_session_quota(workers):
+    first, second = workers
+    boards = [Board.new(SETTINGS) for _ in range(3)]
+    with first.session("a") as session:
+        for board in boards:
+            session.boards.add(board)
+
+    with second.session("a") as session:
+        assert session.boards.is_full and session.boards.available == 0
+        session.boards.remove(boards[0].id)
+    with first.session("a") as session:
+        assert not session.boards.is_full and session.boards.available == 1
+        assert first.outstanding_boards() == 2
+
+    with second.session("b"):
+        pass
+    with pytest.raises(HTTPException):
+        with first.session("c"):
+            pass
+    assert first.session_count() == second.session_count() == 3  # Including the default session